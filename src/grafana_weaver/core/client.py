@@ -2,14 +2,35 @@
 """Grafana API client."""
 
 import base64
+import json
 
-import requests
+# Default number of keep-alive connections retained per host
+POOL_MAXSIZE = 16
+
+# Results requested per /api/search page (Grafana caps the limit at 5000)
+SEARCH_PAGE_SIZE = 5000
+
+
+def _parse_json(response) -> dict | list:
+    """
+    Parse a Grafana API response body.
+
+    Every method parses the raw body the same way, with the standard library
+    json module, which detects the UTF-8/16/32 encoding from the bytes itself.
+
+    Args:
+        response: requests.Response whose status has been checked
+
+    Returns:
+        Decoded JSON body
+    """
+    return json.loads(response.content)
 
 
 class GrafanaClient:
     """Client for interacting with Grafana API."""
 
-    def __init__(self, server: str, user: str, password: str, org_id: int = 1):
+    def __init__(self, server: str, user: str, password: str, org_id: int = 1, pool_maxsize: int = POOL_MAXSIZE):
         """
         Initialize Grafana client.
 
@@ -18,6 +39,8 @@ class GrafanaClient:
             user: Grafana username
             password: Grafana password
             org_id: Grafana organization ID
+            pool_maxsize: Keep-alive connections to retain; match it to the number
+                of threads sharing the client so none are discarded
         """
         self.server = server.rstrip("/")
         self.org_id = org_id
@@ -31,19 +54,45 @@ class GrafanaClient:
         if org_id:
             self._headers["X-Grafana-Org-Id"] = str(org_id)
 
+        # requests (with urllib3 and certifi) is most of the CLI's import time,
+        # so it is only loaded once a client is actually needed
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        # Reuse pooled keep-alive connections across requests to the same server
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
     def list_dashboards(self) -> list[dict]:
         """
         Fetch all dashboards from Grafana.
 
+        Requests the search API in pages of SEARCH_PAGE_SIZE, stopping at the
+        first short page, so large instances are listed in as few round trips
+        as Grafana allows instead of being cut off at its default limit.
+
         Returns:
             List of dashboard metadata dictionaries
 
         Raises:
             requests.HTTPError: If the request fails
         """
-        response = requests.get(f"{self.server}/api/search?type=dash-db", headers=self._headers)
-        response.raise_for_status()
-        return response.json()
+        dashboards = []
+        page = 1
+        while True:
+            response = self._session.get(
+                f"{self.server}/api/search",
+                headers=self._headers,
+                params={"type": "dash-db", "limit": SEARCH_PAGE_SIZE, "page": page},
+            )
+            response.raise_for_status()
+            results = _parse_json(response)
+            dashboards.extend(results)
+            if len(results) < SEARCH_PAGE_SIZE:
+                return dashboards
+            page += 1
 
     def get_dashboard(self, uid: str) -> dict:
         """
@@ -58,9 +107,9 @@ class GrafanaClient:
         Raises:
             requests.HTTPError: If the request fails
         """
-        response = requests.get(f"{self.server}/api/dashboards/uid/{uid}", headers=self._headers)
+        response = self._session.get(f"{self.server}/api/dashboards/uid/{uid}", headers=self._headers)
         response.raise_for_status()
-        return response.json()
+        return _parse_json(response)
 
     def get_folder_by_title(self, title: str) -> dict | None:
         """
@@ -75,9 +124,9 @@ class GrafanaClient:
         Raises:
             requests.HTTPError: If the request fails
         """
-        response = requests.get(f"{self.server}/api/folders", headers=self._headers)
+        response = self._session.get(f"{self.server}/api/folders", headers=self._headers)
         response.raise_for_status()
-        folders = response.json()
+        folders = _parse_json(response)
 
         for folder in folders:
             if folder.get("title") == title:
@@ -98,9 +147,9 @@ class GrafanaClient:
             requests.HTTPError: If the request fails
         """
         payload = {"title": title}
-        response = requests.post(f"{self.server}/api/folders", headers=self._headers, json=payload)
+        response = self._session.post(f"{self.server}/api/folders", headers=self._headers, json=payload)
         response.raise_for_status()
-        return response.json()
+        return _parse_json(response)
 
     def get_or_create_folder(self, title: str) -> dict:
         """
@@ -148,6 +197,6 @@ class GrafanaClient:
         if folder_uid:
             payload["folderUid"] = folder_uid
 
-        response = requests.post(f"{self.server}/api/dashboards/db", headers=self._headers, json=payload)
+        response = self._session.post(f"{self.server}/api/dashboards/db", headers=self._headers, json=payload)
         response.raise_for_status()
-        return response.json()
+        return _parse_json(response)
@@ -5,8 +5,6 @@ import os
 import sys
 from pathlib import Path
 
-import yaml
-
 
 class GrafanaConfigManager:
     """Manager for grafana-weaver configuration files."""
@@ -89,8 +87,14 @@ class GrafanaConfigManager:
             self._config = {"contexts": {}}
             return self._config
 
+        # PyYAML is slow to import and only config commands and Grafana
+        # access need it, so it is imported on first use
+        import yaml
+
+        # Prefer the libyaml-backed parser when PyYAML was built with it
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
         with open(self._config_path) as f:
-            self._config = yaml.safe_load(f) or {"contexts": {}}
+            self._config = yaml.load(f, Loader=loader) or {"contexts": {}}
 
         return self._config
 
@@ -104,9 +108,18 @@ class GrafanaConfigManager:
         if self._config is None:
             return
 
+        import yaml
+
         self._config_path.parent.mkdir(parents=True, exist_ok=True)
         with open(self._config_path, "w") as f:
-            yaml.dump(self._config, f, default_flow_style=False, sort_keys=False)
+            yaml.dump(
+                self._config,
+                f,
+                Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper),
+                default_flow_style=False,
+                sort_keys=False,
+                width=10_000,
+            )
         self._config_path.chmod(0o600)
 
     def get_current_context_name(self) -> str | None:
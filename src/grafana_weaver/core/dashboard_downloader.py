@@ -1,28 +1,41 @@
 #!/usr/bin/env python3
-"""Download dashboards from Grafana to local filesystem."""
+"""Download dashboards from Grafana for extraction."""
 
-import json
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Protocol
 
-from grafana_weaver.core.client import GrafanaClient
+# Number of dashboard detail requests to keep in flight at once
+DEFAULT_MAX_WORKERS = 8
+
+
+class DashboardSource(Protocol):
+    """Read-only subset of the Grafana API used by DashboardDownloader (e.g. GrafanaClient)."""
+
+    def list_dashboards(self) -> list[dict]: ...
+
+    def get_dashboard(self, uid: str) -> dict: ...
 
 
 class DashboardDownloader:
     """
-    Downloads dashboards from Grafana and saves them to disk.
+    Downloads dashboards from Grafana.
 
-    This class handles fetching dashboards from Grafana, organizing them
-    by folder structure, and writing them as JSON files.
+    This class handles fetching dashboards from Grafana and organizing them
+    by folder structure into relative output paths.
     """
 
-    def __init__(self, client: GrafanaClient):
+    def __init__(self, client: DashboardSource, max_workers: int = DEFAULT_MAX_WORKERS):
         """
         Initialize the dashboard downloader.
 
         Args:
-            client: GrafanaClient instance for API access
+            client: GrafanaClient (or any DashboardSource) for API access
+            max_workers: Maximum number of dashboards to fetch concurrently
         """
         self.client = client
+        self.max_workers = max_workers
 
     @staticmethod
     def _sanitize_name(name: str) -> str:
@@ -37,64 +50,68 @@ class DashboardDownloader:
         """
         return name.lower().replace(" ", "-").replace("/", "-")
 
-    def download_all(self, output_dir: Path) -> list[Path]:
+    def _fetch_dashboard(self, uid: str) -> dict | None:
         """
-        Download all dashboards from Grafana to the specified directory.
-
-        Dashboards are organized by folder structure, with folders becoming
-        subdirectories (except for the "General" folder).
+        Fetch a single dashboard, reporting failures instead of raising.
 
         Args:
-            output_dir: Directory to save downloaded dashboards
+            uid: Dashboard UID
 
         Returns:
-            List of paths to downloaded dashboard files
+            Dashboard data, or None if the request failed
+        """
+        try:
+            return self.client.get_dashboard(uid)
+        except Exception as e:
+            print(f"Warning: Failed to fetch dashboard {uid}: {e}")
+            return None
+
+    def fetch_all(self) -> Iterator[tuple[Path, dict]]:
+        """
+        Fetch all dashboards from Grafana without writing them to disk.
+
+        Dashboards are fetched concurrently and yielded in list order as soon
+        as each one arrives. Each is paired with its relative output path,
+        with folders becoming subdirectories (except for the "General"
+        folder).
+
+        Yields:
+            Tuples of (relative path such as folder/title.json, dashboard JSON)
         """
         print("\nDownloading dashboards from Grafana...")
         print("Fetching dashboard list...")
         dashboards = self.client.list_dashboards()
         print(f"Found {len(dashboards)} dashboards")
 
-        # Create output directory
-        output_dir.mkdir(parents=True, exist_ok=True)
-
-        downloaded_files = []
+        folder_names = {}  # folder title -> sanitized directory name
 
-        # Download each dashboard
-        for dash in dashboards:
-            uid = dash["uid"]
-            folder_title = dash.get("folderTitle", "")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(self._fetch_dashboard, [dash["uid"] for dash in dashboards])
 
-            # Fetch full dashboard JSON
-            try:
-                dashboard_data = self.client.get_dashboard(uid)
-            except Exception as e:
-                print(f"Warning: Failed to fetch dashboard {uid}: {e}")
-                continue
+            for dash, dashboard_data in zip(dashboards, results):
+                if dashboard_data is None:
+                    continue
 
-            dashboard_json = dashboard_data["dashboard"]
+                folder_title = dash.get("folderTitle", "")
 
-            # Try to get folder info from the dashboard metadata
-            meta = dashboard_data.get("meta", {})
-            if not folder_title and meta.get("folderTitle"):
-                folder_title = meta["folderTitle"]
+                dashboard_json = dashboard_data["dashboard"]
 
-            title = self._sanitize_name(dashboard_json["title"])
+                # Try to get folder info from the dashboard metadata
+                meta = dashboard_data.get("meta", {})
+                if not folder_title and meta.get("folderTitle"):
+                    folder_title = meta["folderTitle"]
 
-            # Build file path with optional folder
-            if folder_title and folder_title != "General":
-                folder = self._sanitize_name(folder_title)
-                file_path = output_dir / folder / f"{title}.json"
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-            else:
-                file_path = output_dir / f"{title}.json"
+                title = self._sanitize_name(dashboard_json["title"])
 
-            # Write dashboard JSON
-            with open(file_path, "w") as f:
-                json.dump(dashboard_json, f, indent=2)
+                # Build the relative path as a string (with optional folder) and
+                # only make a Path of the dashboards that are actually yielded
+                if folder_title and folder_title != "General":
+                    if folder_title not in folder_names:
+                        folder_names[folder_title] = self._sanitize_name(folder_title)
+                    rel_path = f"{folder_names[folder_title]}/{title}.json"
+                else:
+                    rel_path = f"{title}.json"
 
-            downloaded_files.append(file_path)
-            print(f"  Downloaded: {file_path.relative_to(output_dir.parent)}")
+                yield Path(rel_path), dashboard_json
 
         print(f"\nDashboard download complete! ({len(dashboards)} dashboards)")
-        return downloaded_files
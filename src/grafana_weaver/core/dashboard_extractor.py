@@ -1,11 +1,60 @@
 #!/usr/bin/env python3
 """Dashboard extractor for extracting EXTERNAL content from Grafana dashboard JSON files."""
 
+import functools
 import hashlib
 import json
+import os
 import re
+import secrets
+import shutil
+from collections.abc import Iterable
 from pathlib import Path
 
+from .json_files import load_json_file
+
+# Patterns applied to every EXTERNAL marker line, compiled once at import
+_PARAMS_RE = re.compile(r".*EXTERNAL\s*\(\s*\{([^}]+)\}\s*\)")
+_PARAM_SEP_RE = re.compile(r",\s*")
+_PARAM_PAIR_RE = re.compile(r'^\s*["\']?([^"\':\s]+)["\']?\s*:\s*["\']?([^"\']+)["\']?\s*$')
+_PARAMS_FILENAME_RE = re.compile(r"\([^)]*\{[^}]+\}\s*\)\s*:([^ \t\n\r:)}\]]+)")
+_FILENAME_RE = re.compile(r":([^ \t\n\r:)}\]]+)")
+_PARAMS_BLOCK_RE = re.compile(r"EXTERNAL\s*\([^)]*\{[^}]+\}\s*\)")
+_PLACEHOLDER_RE = re.compile(r'"__(.+?)__"')
+
+
+# Leading text that marks content as JavaScript (matched against lowercased content)
+_JS_PREFIXES = ("function", "const ", "let ", "var ", "//", "return {")
+
+
+@functools.lru_cache(maxsize=2048)
+def _hash_content(content: str) -> str:
+    """Fingerprint content, memoized because shared snippets recur across panels and dashboards."""
+    return hashlib.sha256(content.encode("utf-8"), usedforsecurity=False).hexdigest()[:16]
+
+
+def _extension_for(content: str) -> str:
+    """Classify content by file extension."""
+    content_lower = content.lower().strip()
+
+    # Cheap prefix checks first, in one call; the whole-content substring
+    # scans only run (and stop at the first hit) when no prefix matched
+    if (
+        content_lower.startswith(_JS_PREFIXES)
+        or "function(" in content_lower
+        or "=>" in content_lower
+        or "console.log" in content_lower
+        or (" = {" in content_lower and "\n" in content)
+    ):
+        return ".js"
+    elif content_lower.startswith("<") or "<html" in content_lower:
+        return ".html"
+    elif content_lower.startswith("#"):
+        return ".md"
+    elif "select" in content_lower and "from" in content_lower:
+        return ".sql"
+    return ".txt"
+
 
 class DashboardExtractor:
     """Extractor for processing Grafana dashboards and extracting EXTERNAL content."""
@@ -20,9 +69,9 @@ class DashboardExtractor:
         self.root_dir = Path(root_dir)
         self.src_dir = self.root_dir / "src"
         self.assets_dir = self.src_dir / "assets"
-        self._asset_hashes = {}  # Original state from disk
-        self._written_this_run = set()  # Files written in this run
-        self._written_hashes = {}  # Hashes of written files
+        self._assets_path = os.fspath(self.assets_dir)  # str form for per-asset joins
+        self._asset_hashes = {}  # Original state from disk (hashed on first use)
+        self._claimed_contents = {}  # Asset content claimed by the first dashboard using each file this run
         self._modifications = []  # Track all modifications
 
     def extract_from_file(self, json_file: Path, base_dir: Path = None) -> bool:
@@ -43,15 +92,12 @@ class DashboardExtractor:
 
         # Load and parse JSON
         try:
-            with open(json_file) as f:
-                data = json.load(f)
+            data = load_json_file(json_file)
         except json.JSONDecodeError as e:
             print(f"Error: Invalid JSON in file: {json_file}")
             print(f"JSON Error: {e}")
             return False
 
-        # Set up output directory structure
-
         # Detect subdirectory structure if base_dir is provided
         if base_dir:
             json_file_abs = json_file.resolve()
@@ -64,26 +110,72 @@ class DashboardExtractor:
         else:
             template_dir = self.src_dir
 
+        self._begin_batch()
+        return self._extract_data(data, json_file, template_dir, json_file.stem)
+
+    def extract_from_dashboards(self, dashboards: Iterable[tuple[Path, dict]]) -> bool:
+        """
+        Extract EXTERNAL content from already-parsed dashboards.
+
+        Lets callers that hold dashboard JSON in memory (such as the download
+        command) skip writing it to disk and reading it back. Existing assets
+        are loaded and hashed once for the whole batch.
+
+        Args:
+            dashboards: Pairs of (relative path such as folder/title.json,
+                dashboard JSON). The path decides where the template is
+                written under src/.
+
+        Returns:
+            True if all dashboards succeeded, False on the first with errors
+        """
+        self._begin_batch()
+        count = 0
+        for rel_path, data in dashboards:
+            count += 1
+            rel_path = Path(rel_path)
+            if not self._extract_data(data, rel_path, self.src_dir / rel_path.parent, rel_path.stem):
+                return False
+
+        if not count:
+            print("No dashboards to process")
+        return True
+
+    def _begin_batch(self):
+        """List existing assets once before extracting a file or a batch of dashboards."""
+        print("\nLoading existing assets...")
+        self._assets_path = os.fspath(self.assets_dir)
+        self._load_existing_assets()
+        if self._asset_hashes:
+            print(f"Found {len(self._asset_hashes)} existing asset(s)")
+        else:
+            print("No existing assets found")
+
+    def _extract_data(self, data: dict, source: Path, template_dir: Path, name: str) -> bool:
+        """
+        Extract EXTERNAL content from parsed dashboard JSON and write its template.
+
+        Args:
+            data: Dashboard JSON; modified in place
+            source: Where the dashboard came from, for progress output
+            template_dir: Directory to write the jsonnet template to
+            name: Template file name without extension
+
+        Returns:
+            True if successful, False if errors occurred
+        """
         # Ensure directories exist
         self.assets_dir.mkdir(parents=True, exist_ok=True)
         template_dir.mkdir(parents=True, exist_ok=True)
 
         # Print processing header
         dashboard_id = data.get("uid", data.get("id", "dashboard"))
-        print(f"Processing: {json_file}")
+        print(f"Processing: {source}")
         print(f"Dashboard ID: {dashboard_id}")
         print(f"Assets directory: {self.assets_dir}")
         print(f"Template directory: {template_dir}")
         print("=" * 50)
 
-        # Load existing asset hashes
-        print("\nLoading existing assets...")
-        self._load_existing_assets()
-        if self._asset_hashes:
-            print(f"Found {len(self._asset_hashes)} existing asset(s)")
-        else:
-            print("No existing assets found")
-
         # Extract EXTERNAL content
         print("\nProcessing EXTERNAL content...")
         self._modifications = []
@@ -100,7 +192,7 @@ class DashboardExtractor:
             data["version"] = 1
 
         # Write jsonnet template
-        template_path = template_dir / f"{json_file.stem}.jsonnet"
+        template_path = template_dir / f"{name}.jsonnet"
         self._write_jsonnet_template(data, template_path)
 
         # Print summary
@@ -126,32 +218,63 @@ class DashboardExtractor:
         return True
 
     def _load_existing_assets(self):
-        """Load all existing asset files and compute their content hashes."""
+        """
+        List existing asset files.
+
+        Content hashes are computed lazily by _existing_asset_hash, so a run
+        only reads the assets its dashboards actually reference.
+        """
         self._asset_hashes = {}
 
         if not self.assets_dir.exists():
             return
 
-        for asset_file in self.assets_dir.glob("*"):
-            if asset_file.is_file():
-                try:
-                    with open(asset_file) as f:
-                        content = f.read()
-                    self._asset_hashes[asset_file.name] = self._compute_hash(content)
-                except Exception as e:
-                    print(f"Warning: Could not read {asset_file.name}: {e}")
+        # scandir entries know their file type, so no extra stat per asset
+        with os.scandir(self.assets_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    self._asset_hashes[entry.name] = None
+
+    def _existing_asset_hash(self, filename: str) -> str | None:
+        """
+        Get the content hash of an asset as it was on disk at the start of the run.
+
+        Args:
+            filename: Asset file name
+
+        Returns:
+            Hash of the asset's content, or None if it did not exist or could not be read
+        """
+        if filename not in self._asset_hashes:
+            return None
+
+        if self._asset_hashes[filename] is None:
+            try:
+                with open(os.path.join(self._assets_path, filename), encoding="utf-8") as f:
+                    content = f.read()
+            except Exception as e:
+                print(f"Warning: Could not read {filename}: {e}")
+                del self._asset_hashes[filename]
+                return None
+            self._asset_hashes[filename] = self._compute_hash(content)
+
+        return self._asset_hashes[filename]
 
     def _compute_hash(self, content: str) -> str:
         """
         Compute SHA-256 hash of content.
 
+        The hash is only a content fingerprint for change detection, so it is
+        flagged as not used for security (keeps it available under FIPS).
+        Results are memoized per content string.
+
         Args:
             content: String content to hash
 
         Returns:
             Hexadecimal hash string (first 16 characters)
         """
-        return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+        return _hash_content(content)
 
     def _extract_from_object(self, obj, path: str = "", root_data: dict = None):
         """
@@ -162,19 +285,22 @@ class DashboardExtractor:
             path: Current JSON path
             root_data: The complete dashboard JSON
         """
+        # Paths are only built for containers and hits, and the marker check
+        # only looks for the first line once the value contains EXTERNAL at all
         if isinstance(obj, dict):
             for key, value in obj.items():
-                current_path = f"{path}.{key}" if path else key
-
-                if isinstance(value, str) and "EXTERNAL" in value.split("\n")[0]:
-                    print(f"Found EXTERNAL at: {current_path}")
-                    obj[key] = self._process_external_value(value, key, current_path, root_data)
-                else:
-                    self._extract_from_object(value, current_path, root_data)
+                if isinstance(value, str):
+                    if "EXTERNAL" in value and "EXTERNAL" in value.partition("\n")[0]:
+                        current_path = f"{path}.{key}" if path else key
+                        print(f"Found EXTERNAL at: {current_path}")
+                        obj[key] = self._process_external_value(value, key, current_path, root_data)
+                elif isinstance(value, (dict, list)):
+                    self._extract_from_object(value, f"{path}.{key}" if path else key, root_data)
 
         elif isinstance(obj, list):
             for index, item in enumerate(obj):
-                self._extract_from_object(item, f"{path}[{index}]", root_data)
+                if isinstance(item, (dict, list)):
+                    self._extract_from_object(item, f"{path}[{index}]", root_data)
 
     def _process_external_value(self, value: str, key: str, path: str, root_data: dict) -> str:
         """
@@ -202,30 +328,24 @@ class DashboardExtractor:
             new_external_line = self._create_external_line(external_line, filename)
             full_content = new_external_line + "\n" + content
             full_content_normalized = full_content.rstrip("\n") + "\n"
-            new_hash = self._compute_hash(full_content_normalized)
 
-            # Check if already written this run
-            if filename in self._written_this_run:
-                if self._written_hashes.get(filename) == new_hash:
+            # Check if already claimed this run (whether or not that needed a
+            # write). Both sides are in memory, so compare the content itself;
+            # hashing is only needed against disk.
+            if filename in self._claimed_contents:
+                if self._claimed_contents[filename] == full_content_normalized:
                     print(f"  Skipping {filename} (same content as first panel)")
                 else:
                     # Conflict - save to .conflict file
-                    conflict_num = 1
-                    while (self.assets_dir / f"{filename}.conflict{conflict_num}").exists():
-                        conflict_num += 1
-
-                    conflict_filename = f"{filename}.conflict{conflict_num}"
+                    conflict_filename = self._write_conflict_asset(filename, full_content_normalized)
                     print(f"  ⚠️  WARNING: Conflict detected for {filename}")
                     print(f"      First write wins, saving conflicting content to {conflict_filename}")
-
-                    conflict_file = self.assets_dir / conflict_filename
-                    with open(conflict_file, "w") as f:
-                        f.write(full_content_normalized)
             else:
                 # Check if we need to write based on existing content
                 should_write = True
-                if filename in self._asset_hashes:
-                    if self._asset_hashes[filename] == new_hash:
+                existing_hash = self._existing_asset_hash(filename)
+                if existing_hash is not None:
+                    if existing_hash == self._compute_hash(full_content_normalized):
                         should_write = False
                         print(f"  Skipping {filename} (no changes)")
                     else:
@@ -234,11 +354,8 @@ class DashboardExtractor:
                     print(f"  Creating {filename}")
 
                 if should_write:
-                    asset_file = self.assets_dir / filename
-                    with open(asset_file, "w") as f:
-                        f.write(full_content_normalized)
-                    self._written_this_run.add(filename)
-                    self._written_hashes[filename] = new_hash
+                    self._write_asset(filename, full_content_normalized)
+                self._claimed_contents[filename] = full_content_normalized
 
             # Generate variable name
             var_name = filename.replace("-", "_").replace(".", "_")
@@ -253,6 +370,63 @@ class DashboardExtractor:
             return f"__{var_names[0]}__"
         return f"__CONCAT__{' + '.join(var_names)}__"
 
+    def _write_asset(self, filename: str, content: str):
+        """
+        Write an asset file atomically.
+
+        Assets are always UTF-8, like the templates that import them. The
+        content is written to a uniquely named temporary file beside the
+        asset that then replaces it, so an interrupted run never leaves a
+        truncated asset behind and concurrent runs never share a temporary
+        file. A symlinked asset is written through to its target, and an
+        existing asset keeps its permissions.
+
+        Args:
+            filename: Asset file name
+            content: Complete asset content
+        """
+        asset_path = os.path.realpath(os.path.join(self._assets_path, filename))
+        tmp_path = os.path.join(os.path.dirname(asset_path), f".{filename}.{secrets.token_hex(8)}.tmp")
+        # Created exclusively with mode 0o666, so the kernel applies the
+        # current umask just as for a plain open() of a new asset
+        fd = os.open(tmp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content.encode("utf-8"))
+            try:
+                shutil.copymode(asset_path, tmp_path)
+            except FileNotFoundError:
+                pass  # New asset: keep the umask-derived mode
+            os.replace(tmp_path, asset_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _write_conflict_asset(self, filename: str, content: str) -> str:
+        """
+        Write conflicting content to the first free numbered .conflict file.
+
+        Each candidate is created exclusively (O_EXCL), so taking a name is a
+        single open rather than an exists() check followed by a write, and
+        two runs can never claim the same conflict file.
+
+        Args:
+            filename: Asset file name the content conflicts with
+            content: Complete asset content
+
+        Returns:
+            Name of the conflict file written
+        """
+        conflict_num = 1
+        while True:
+            conflict_filename = f"{filename}.conflict{conflict_num}"
+            try:
+                with open(os.path.join(self._assets_path, conflict_filename), "x", encoding="utf-8") as f:
+                    f.write(content)
+                return conflict_filename
+            except FileExistsError:
+                conflict_num += 1
+
     def _split_on_external(self, value: str) -> list[tuple[str, str]]:
         """
         Split a multi-line value into segments at EXTERNAL markers.
@@ -263,24 +437,24 @@ class DashboardExtractor:
         Returns:
             List of (external_line, content) tuples
         """
-        lines = value.split("\n")
+        # Locate marker lines with C-level str.find calls rather than walking
+        # every line of the value in Python
+        markers = []  # (line start, line end) of each marker line
+        pos = value.find("EXTERNAL")
+        while pos != -1:
+            line_start = value.rfind("\n", 0, pos) + 1
+            line_end = value.find("\n", pos)
+            if line_end == -1:
+                line_end = len(value)
+            markers.append((line_start, line_end))
+            pos = value.find("EXTERNAL", line_end)
+
+        # Each segment's content runs from after its marker line up to the
+        # newline before the next marker line (or the end of the value)
         segments = []
-        current_external_line = None
-        current_content = []
-
-        for line in lines:
-            if "EXTERNAL" in line:
-                if current_external_line is not None:
-                    segments.append((current_external_line, "\n".join(current_content)))
-
-                current_external_line = line
-                current_content = []
-            else:
-                if current_external_line is not None:
-                    current_content.append(line)
-
-        if current_external_line is not None:
-            segments.append((current_external_line, "\n".join(current_content)))
+        for i, (line_start, line_end) in enumerate(markers):
+            content_end = markers[i + 1][0] - 1 if i + 1 < len(markers) else len(value)
+            segments.append((value[line_start:line_end], value[line_end + 1 : content_end]))
 
         return segments
 
@@ -294,13 +468,18 @@ class DashboardExtractor:
         Returns:
             Dictionary of parameters or None
         """
-        match = re.match(r".*EXTERNAL\s*\(\s*\{([^}]+)\}\s*\)", line)
+        # Most markers carry no parameters; a plain substring test rejects them
+        # without running the backtracking pattern over the line
+        if "{" not in line:
+            return None
+
+        match = _PARAMS_RE.match(line)
         if not match:
             return None
 
         params = {}
-        for pair in re.split(r",\s*", match.group(1)):
-            kv_match = re.match(r'^\s*["\']?([^"\':\s]+)["\']?\s*:\s*["\']?([^"\']+)["\']?\s*$', pair)
+        for pair in _PARAM_SEP_RE.split(match.group(1)):
+            kv_match = _PARAM_PAIR_RE.match(pair)
             if kv_match:
                 params[kv_match.group(1).strip()] = kv_match.group(2).strip()
         return params if params else None
@@ -323,10 +502,10 @@ class DashboardExtractor:
         after_external = line[external_pos + 8 :]
 
         if params:
-            match = re.search(r"\([^)]*\{[^}]+\}\s*\)\s*:([^ \t\n\r:)}\]]+)", after_external)
+            match = _PARAMS_FILENAME_RE.search(after_external)
             return match.group(1).strip() if match else None
         elif after_external.startswith(":"):
-            match = re.match(r":([^ \t\n\r:)}\]]+)", after_external)
+            match = _FILENAME_RE.match(after_external)
             return match.group(1).strip() if match else None
 
         return None
@@ -387,29 +566,7 @@ class DashboardExtractor:
         Returns:
             File extension including leading dot
         """
-        content_lower = content.lower().strip()
-
-        js_indicators = [
-            content_lower.startswith("function"),
-            content_lower.startswith("const "),
-            content_lower.startswith("let "),
-            content_lower.startswith("var "),
-            content_lower.startswith("//"),
-            "function(" in content_lower,
-            "=>" in content_lower,
-            "console.log" in content_lower,
-            content_lower.startswith("return {"),
-            " = {" in content_lower and "\n" in content,
-        ]
-        if any(js_indicators):
-            return ".js"
-        elif content_lower.startswith("<") or "<html" in content_lower:
-            return ".html"
-        elif content_lower.startswith("#") or content_lower.startswith("##"):
-            return ".md"
-        elif "select" in content_lower and "from" in content_lower:
-            return ".sql"
-        return ".txt"
+        return _extension_for(content)
 
     def _create_external_line(self, original_line: str, filename: str) -> str:
         """
@@ -426,6 +583,9 @@ class DashboardExtractor:
         external_pos = original_line.find("EXTERNAL")
         before_external = original_line[:external_pos]
 
+        # Locate the EXTERNAL({...}) block once; it is needed twice below
+        params_match = _PARAMS_BLOCK_RE.search(original_line) if params else None
+
         existing_filename = self._extract_filename_from_line(original_line)
 
         if existing_filename:
@@ -436,19 +596,16 @@ class DashboardExtractor:
                 after_filename = ""
         else:
             if params:
-                match = re.search(r"EXTERNAL\s*\([^)]*\{[^}]+\}\s*\)", original_line)
-                if match:
-                    after_filename = original_line[match.end() :]
+                if params_match:
+                    after_filename = original_line[params_match.end() :]
                 else:
                     after_filename = ""
             else:
                 after_filename = original_line[external_pos + 8 :]
 
-        if params:
-            match = re.search(r"EXTERNAL\s*\([^)]*\{[^}]+\}\s*\)", original_line)
-            if match:
-                params_block = match.group(0)
-                return f"{before_external}{params_block}:{filename}{after_filename}"
+        if params_match:
+            params_block = params_match.group(0)
+            return f"{before_external}{params_block}:{filename}{after_filename}"
 
         return f"{before_external}EXTERNAL:{filename}{after_filename}"
 
@@ -463,9 +620,7 @@ class DashboardExtractor:
         json_content = json.dumps(data, indent=2, ensure_ascii=False)
 
         if not self._modifications:
-            with open(output_path, "w") as f:
-                f.write(json_content)
-                f.write('\n')
+            self._write_template_text(output_path, json_content + "\n")
             return
 
         # Deduplicate imports
@@ -487,11 +642,28 @@ class DashboardExtractor:
             content = match.group(1)
             return content[8:] if content.startswith("CONCAT__") else content
 
-        json_content = re.sub(r'"__(.+?)__"', replace_placeholder, json_content)
+        json_content = _PLACEHOLDER_RE.sub(replace_placeholder, json_content)
 
         # Write template
-        with open(output_path, "w") as f:
-            if local_vars:
-                f.write("\n".join(local_vars) + "\n\n")
-            f.write(json_content)
-            f.write('\n')
+        header = "\n".join(local_vars) + "\n\n" if local_vars else ""
+        self._write_template_text(output_path, header + json_content + "\n")
+
+    def _write_template_text(self, output_path: Path, text: str):
+        """
+        Write a jsonnet template, leaving the file untouched if it is unchanged.
+
+        Templates are always UTF-8, as jsonnet reads them. Skipping identical
+        rewrites keeps re-runs over unchanged dashboards free of disk writes
+        and mtime churn.
+
+        Args:
+            output_path: Path to write jsonnet file to
+            text: Complete template text
+        """
+        try:
+            if output_path.read_text(encoding="utf-8") == text:
+                print("Template unchanged")
+                return
+        except (FileNotFoundError, UnicodeDecodeError):
+            pass
+        output_path.write_text(text, encoding="utf-8")
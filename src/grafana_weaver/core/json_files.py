@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""JSON file reading shared by the extract and upload steps."""
+
+import json
+from pathlib import Path
+
+
+def load_json_file(path: Path) -> dict | list:
+    """
+    Parse a JSON file straight from its bytes.
+
+    json.loads detects UTF-8/16/32 (with or without a BOM) from the bytes
+    itself, so reading bytes rather than text skips Python's
+    locale-dependent text layer and files parse the same everywhere.
+
+    Args:
+        path: JSON file to read
+
+    Returns:
+        Parsed JSON value
+
+    Raises:
+        OSError: If the file cannot be read
+        json.JSONDecodeError: If the file is not valid JSON
+    """
+    return json.loads(path.read_bytes())
@@ -2,25 +2,54 @@
 """Jsonnet builder for Grafana dashboards."""
 
 import json
+import os
 import sys
+from collections.abc import Iterator
 from pathlib import Path
 
 import _jsonnet
 
 
+def _iter_files(root: Path, suffix: str) -> Iterator[Path]:
+    """
+    Recursively yield files under root whose name ends with suffix.
+
+    Uses os.scandir, whose entries carry the file type from the directory
+    listing, so only matching files are turned into Path objects and no
+    per-entry stat call is needed.
+
+    Args:
+        root: Directory to search
+        suffix: File name suffix to match (e.g. ".jsonnet")
+
+    Yields:
+        Paths of matching files
+    """
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(suffix) and entry.is_file():
+                    yield Path(entry.path)
+
+
 class JsonnetBuilder:
     """Builder for compiling Jsonnet templates to JSON."""
 
-    def __init__(self, dashboards_dir: Path):
+    def __init__(self, dashboards_dir: Path, max_workers: int | None = None):
         """
         Initialize Jsonnet builder.
 
         Args:
             dashboards_dir: Base directory containing the dashboards
+            max_workers: Maximum number of build processes (defaults to the CPU count; 1 builds in-process)
         """
         self.dashboards_dir = Path(dashboards_dir)
         self.src_dir = self.dashboards_dir / "src"
         self.build_dir = self.dashboards_dir / "build"
+        self.max_workers = max_workers
 
     def build_all(self) -> list[Path]:
         """
@@ -36,24 +65,36 @@ class JsonnetBuilder:
             SystemExit: If any build fails
         """
         # Find all .jsonnet files
-        jsonnet_files = list(self.src_dir.glob("**/*.jsonnet"))
+        jsonnet_files = list(_iter_files(self.src_dir, ".jsonnet")) if self.src_dir.is_dir() else []
 
         if not jsonnet_files:
             print(f"No .jsonnet files found in {self.src_dir}")
             return []
 
-        built_files = []
-        for dashboard_file in jsonnet_files:
-            print(f"Building {dashboard_file}")
-            output_file = self._build_one(dashboard_file)
-            built_files.append(output_file)
+        # Create each output directory once, before any build runs (or is
+        # handed to a worker process), rather than once per dashboard
+        for build_path in {self.build_dir / f.relative_to(self.src_dir).parent for f in jsonnet_files}:
+            build_path.mkdir(parents=True, exist_ok=True)
 
-        return built_files
+        # Never start more processes than there are files (or, by default, CPUs):
+        # forked workers are all started up front, whether they get work or not
+        max_workers = min(len(jsonnet_files), self.max_workers or os.cpu_count() or 1)
+        if max_workers == 1:
+            return [self._build_one(dashboard_file) for dashboard_file in jsonnet_files]
+
+        # Jsonnet evaluation is CPU-bound and holds the GIL, so fan out across
+        # processes (multiprocessing is imported only when it is used)
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self._build_one, jsonnet_files))
 
     def _build_one(self, jsonnet_file: Path) -> Path:
         """
         Build a single Jsonnet file to JSON.
 
+        The output directory must already exist (build_all creates it).
+
         Args:
             jsonnet_file: Path to the Jsonnet file
 
@@ -63,25 +104,22 @@ class JsonnetBuilder:
         Raises:
             SystemExit: If build fails
         """
+        print(f"Building {jsonnet_file}")
+
         # Get the relative path from src directory
         rel_path = jsonnet_file.relative_to(self.src_dir)
 
-        # Create corresponding build directory
-        build_path = self.build_dir / rel_path.parent
-        build_path.mkdir(parents=True, exist_ok=True)
-
-        # Output JSON file path
-        output_file = build_path / f"{jsonnet_file.stem}.json"
+        # Output JSON file path in the corresponding build directory
+        output_file = self.build_dir / rel_path.parent / f"{jsonnet_file.stem}.json"
 
         # Build jsonnet to JSON using Python jsonnet library
         try:
             # Evaluate jsonnet file
             json_str = _jsonnet.evaluate_file(str(jsonnet_file))
 
-            # Parse and pretty-print the JSON
+            # Parse and pretty-print the JSON, writing it in a single call
             json_data = json.loads(json_str)
-            with open(output_file, "w") as f:
-                json.dump(json_data, f, indent=2)
+            output_file.write_text(json.dumps(json_data, indent=2))
 
             return output_file
 
@@ -102,4 +140,4 @@ class JsonnetBuilder:
         if not self.build_dir.exists():
             return []
 
-        return list(self.build_dir.rglob("*.json"))
+        return list(_iter_files(self.build_dir, ".json"))
@@ -2,25 +2,52 @@
 """Main CLI entrypoint for grafana-weaver."""
 
 import argparse
-import json
 import os
-import shutil
 import sys
-import tempfile
-from importlib.metadata import version
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from grafana_weaver.core.client import GrafanaClient
 from grafana_weaver.core.config_manager import GrafanaConfigManager
-from grafana_weaver.core.dashboard_downloader import DashboardDownloader
+from grafana_weaver.core.dashboard_downloader import DEFAULT_MAX_WORKERS, DashboardDownloader
 from grafana_weaver.core.dashboard_extractor import DashboardExtractor
+from grafana_weaver.core.json_files import load_json_file
 from grafana_weaver.core.jsonnet_builder import JsonnetBuilder
 
-# Read version from package metadata (defined in pyproject.toml)
-try:
-    __version__ = version("grafana-weaver")
-except Exception:
-    __version__ = "unknown"
+
+def get_version() -> str:
+    """
+    Read the installed version from package metadata (defined in pyproject.toml).
+
+    importlib.metadata is slow to import and scan, so this only runs for --version.
+
+    Returns:
+        Package version, or "unknown" if it is not installed
+    """
+    from importlib.metadata import version
+
+    try:
+        return version("grafana-weaver")
+    except Exception:
+        return "unknown"
+
+
+def __getattr__(name):
+    # Keep grafana_weaver.main.__version__ available without the start-up cost
+    if name == "__version__":
+        return get_version()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _VersionAction(argparse.Action):
+    """argparse --version action that looks the version up only when used."""
+
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, default=argparse.SUPPRESS, help=None):
+        super().__init__(option_strings=option_strings, dest=dest, default=default, nargs=0, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        print(f"{parser.prog} {get_version()}")
+        parser.exit()
 
 
 # ============================================================================
@@ -195,54 +222,71 @@ def upload_dashboards(args):
         user=grafana_config["user"],
         password=grafana_config["password"],
         org_id=grafana_config.get("org-id", 1),
+        pool_maxsize=args.concurrency,
     )
 
     # Upload dashboards
     print("\nUploading dashboards to Grafana...")
     print(f"Found {len(json_files)} dashboards to upload")
 
-    success_count = 0
-    error_count = 0
-
     # Cache for folder title -> folder UID mapping
     folder_cache = {}
-
-    for json_file in json_files:
-        # Read the dashboard JSON
-        with open(json_file) as f:
-            dashboard_json = json.load(f)
-
-        # Extract folder from file path
-        # File structure: dashboard_dir/build/[folder/]dashboard.json
-        build_dir = args.dashboard_dir / "build"
-        relative_path = json_file.relative_to(build_dir)
-
-        folder_uid = None
-        if len(relative_path.parts) > 1:
-            # Dashboard is in a subfolder
-            folder_name = relative_path.parts[0]
-
-            # Get or create the folder, using cache to avoid repeated API calls
-            if folder_name not in folder_cache:
-                try:
-                    # Convert folder name back to title format (reverse sanitization)
-                    folder_title = folder_name.replace("-", " ").title()
-                    folder = client.get_or_create_folder(folder_title)
-                    folder_cache[folder_name] = folder["uid"]
-                    print(f"  Using folder: {folder_title}")
-                except Exception as e:
-                    print(f"  Warning: Failed to get/create folder '{folder_name}': {e}")
-                    folder_cache[folder_name] = None
-
-            folder_uid = folder_cache[folder_name]
-
+    build_dir = args.dashboard_dir / "build"
+
+    def prepare_uploads():
+        """Read each dashboard and resolve its folder, one at a time and in order."""
+        for json_file in json_files:
+            # Read the dashboard JSON
+            dashboard_json = load_json_file(json_file)
+
+            # Extract folder from file path
+            # File structure: dashboard_dir/build/[folder/]dashboard.json
+            relative_path = json_file.relative_to(build_dir)
+
+            folder_uid = None
+            if len(relative_path.parts) > 1:
+                # Dashboard is in a subfolder
+                folder_name = relative_path.parts[0]
+
+                # Get or create the folder, using cache to avoid repeated API calls
+                if folder_name not in folder_cache:
+                    try:
+                        # Convert folder name back to title format (reverse sanitization)
+                        folder_title = folder_name.replace("-", " ").title()
+                        folder = client.get_or_create_folder(folder_title)
+                        folder_cache[folder_name] = folder["uid"]
+                        print(f"  Using folder: {folder_title}")
+                    except Exception as e:
+                        print(f"  Warning: Failed to get/create folder '{folder_name}': {e}")
+                        folder_cache[folder_name] = None
+
+                folder_uid = folder_cache[folder_name]
+
+            yield json_file, dashboard_json, folder_uid
+
+    def upload(job):
+        """Upload one dashboard, returning the error instead of raising."""
+        json_file, dashboard_json, folder_uid = job
         try:
             client.upload_dashboard(dashboard_json, folder_uid=folder_uid)
-            print(f"  ✓ Uploaded: {dashboard_json.get('title', json_file.name)}")
-            success_count += 1
+            return json_file, dashboard_json, None
         except Exception as e:
-            print(f"  ✗ Failed to upload {json_file.name}: {e}")
-            error_count += 1
+            return json_file, dashboard_json, e
+
+    success_count = 0
+    error_count = 0
+
+    # Folders are resolved sequentially (so each is created once), while the
+    # dashboard uploads themselves overlap over the client's pooled session.
+    # Results are reported in file order.
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for json_file, dashboard_json, error in executor.map(upload, prepare_uploads()):
+            if error is None:
+                print(f"  ✓ Uploaded: {dashboard_json.get('title', json_file.name)}")
+                success_count += 1
+            else:
+                print(f"  ✗ Failed to upload {json_file.name}: {error}")
+                error_count += 1
 
     print(f"\nUpload complete: {success_count} succeeded, {error_count} failed")
 
@@ -276,44 +320,25 @@ def download_dashboards(args):
         user=grafana_config["user"],
         password=grafana_config["password"],
         org_id=grafana_config.get("org-id", 1),
+        pool_maxsize=args.concurrency,
     )
 
-    # Create temporary directory for downloads
-    downloaded_dir = Path(tempfile.mkdtemp())
-
-    try:
-        # Step 1: Download dashboards from Grafana
-        print("\nStep 1: Downloading dashboards from Grafana...")
-        downloader = DashboardDownloader(client)
-        downloaded_files = downloader.download_all(downloaded_dir)
-
-        # Step 2: Process dashboards to extract external content
-        print("\nStep 2: Processing dashboards to extract external content...")
-        extractor = DashboardExtractor(args.dashboard_dir)
-
-        if not downloaded_files:
-            print("No dashboards to process")
-        else:
-            for json_file in downloaded_files:
-                print(f"Processing: {json_file}")
-
-                # Process the JSON file using the extractor
-                success = extractor.extract_from_file(json_file, base_dir=downloaded_dir)
-
-                if not success:
-                    print(f"Error processing {json_file}")
-                    sys.exit(1)
+    # Hand each dashboard to the extractor as soon as it is fetched; nothing
+    # is staged on disk in between
+    print("\nDownloading dashboards and extracting external content...")
+    downloader = DashboardDownloader(client, max_workers=args.concurrency)
+    extractor = DashboardExtractor(args.dashboard_dir)
+    dashboards = downloader.fetch_all()
 
-        print("\n" + "=" * 42)
-        print("Dashboard download complete!")
-        print("=" * 42)
-        print(f"  - Jsonnet templates: {args.dashboard_dir}/src/")
-        print(f"  - Assets: {args.dashboard_dir}/src/assets/")
+    if not extractor.extract_from_dashboards(dashboards):
+        print("Error processing downloaded dashboards")
+        sys.exit(1)
 
-    finally:
-        # Clean up temporary directory
-        if downloaded_dir.exists():
-            shutil.rmtree(downloaded_dir)
+    print("\n" + "=" * 42)
+    print("Dashboard download complete!")
+    print("=" * 42)
+    print(f"  - Jsonnet templates: {args.dashboard_dir}/src/")
+    print(f"  - Assets: {args.dashboard_dir}/src/assets/")
 
 
 # ============================================================================
@@ -336,6 +361,32 @@ def extract_external_content(args):
 # ============================================================================
 
 
+def positive_int(value: str) -> int:
+    """
+    argparse type for worker counts: a strictly positive integer.
+
+    String defaults (such as ones read from the environment) go through this
+    too, so a bad value is reported as a usage error of the command using it
+    rather than crashing while the parser is built.
+
+    Args:
+        value: Command-line or default value
+
+    Returns:
+        The parsed integer
+
+    Raises:
+        argparse.ArgumentTypeError: If value is not an integer greater than 0
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value!r}")
+    return number
+
+
 def add_dashboard_dir_arg(parser):
     """Add common arguments to a parser."""
     parser.add_argument(
@@ -361,8 +412,8 @@ def main():
     )
     parser.add_argument(
         "--version",
-        action="version",
-        version=f"%(prog)s {__version__}",
+        action=_VersionAction,
+        help="show program's version number and exit",
     )
 
     subparsers = parser.add_subparsers(dest="command", required=True, help="Available commands")
@@ -433,12 +484,30 @@ def main():
     upload_parser = subparsers.add_parser("upload", help="Upload dashboards to Grafana")
     add_dashboard_dir_arg(upload_parser)
     add_grafana_context_arg(upload_parser)
+    upload_parser.add_argument(
+        "--concurrency",
+        type=positive_int,
+        default=os.environ.get("GRAFANA_UPLOAD_CONCURRENCY", str(DEFAULT_MAX_WORKERS)),
+        help=(
+            "Number of dashboards to upload in parallel "
+            f"(defaults to GRAFANA_UPLOAD_CONCURRENCY env var or {DEFAULT_MAX_WORKERS})"
+        ),
+    )
     upload_parser.set_defaults(func=upload_dashboards)
 
     # Download subcommand
     download_parser = subparsers.add_parser("download", help="Download dashboards from Grafana")
     add_dashboard_dir_arg(download_parser)
     add_grafana_context_arg(download_parser)
+    download_parser.add_argument(
+        "--concurrency",
+        type=positive_int,
+        default=os.environ.get("GRAFANA_DOWNLOAD_CONCURRENCY", str(DEFAULT_MAX_WORKERS)),
+        help=(
+            "Number of dashboards to fetch in parallel "
+            f"(defaults to GRAFANA_DOWNLOAD_CONCURRENCY env var or {DEFAULT_MAX_WORKERS})"
+        ),
+    )
     download_parser.set_defaults(func=download_dashboards)
 
     # Extract subcommand
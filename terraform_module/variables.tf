@@ -48,3 +48,9 @@ variable "dashboard_upload_enabled" {
   type        = bool
   default     = false
 }
+
+variable "refresh_grafana_weaver" {
+  description = "Re-resolve grafana-weaver from the package index on every apply (set to false to reuse uv's cached install)"
+  type        = bool
+  default     = true
+}
@@ -33,6 +33,23 @@ class TestDataHelper:
         return self.base_path / test_case / "assets"
 
 
+class JsonnetSrcTree:
+    """Helper for laying out a dashboards directory with jsonnet sources."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.src_dir = root / "src"
+        self.build_dir = root / "build"
+        self.src_dir.mkdir()
+
+    def make_jsonnet(self, relative_path: str, content: str) -> Path:
+        """Write a jsonnet file under src/, creating parent folders as needed."""
+        jsonnet_file = self.src_dir / relative_path
+        jsonnet_file.parent.mkdir(parents=True, exist_ok=True)
+        jsonnet_file.write_text(content)
+        return jsonnet_file
+
+
 @pytest.fixture
 def test_data():
     """
@@ -79,3 +96,16 @@ def dashboards_structure(temp_dir):
         "build": build_dir,
         "assets": assets_dir,
     }
+
+
+@pytest.fixture
+def jsonnet_src_tree(tmp_path):
+    """
+    Fixture that provides a dashboards directory with an empty src/ folder.
+
+    Usage:
+        jsonnet_file = jsonnet_src_tree.make_jsonnet("folder/test.jsonnet", "{}")
+        builder = JsonnetBuilder(jsonnet_src_tree.root)
+        output_file = jsonnet_src_tree.build_dir / "folder" / "test.json"
+    """
+    return JsonnetSrcTree(tmp_path)
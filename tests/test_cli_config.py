@@ -316,7 +316,7 @@ class TestCheckConfig:
     def test_check_config_incomplete(self, mock_manager_class, capsys, tmp_path):
         """Should warn about incomplete configuration."""
         config_file = tmp_path / "config.yaml"
-        config_file.write_text(yaml.dump({"current-context": "test-ctx", "contexts": {"test-ctx": {"grafana": {}}}}))
+        config_file.write_text("current-context: test-ctx\ncontexts:\n  test-ctx:\n    grafana: {}\n")
 
         mock_manager = Mock()
         mock_manager.config_path = config_file
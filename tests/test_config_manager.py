@@ -1,10 +1,35 @@
 """Tests for GrafanaConfigManager class."""
 
+from unittest.mock import patch
+
 import pytest
 import yaml
 
 from grafana_weaver.core.config_manager import GrafanaConfigManager
 
+# Literal YAML for the most common fixture, so setup skips the YAML emitter
+EMPTY_CONFIG_YAML = "contexts: {}\n"
+
+
+def write_xdg_config(config_dir, config_data):
+    """
+    Write config_dir/grafanactl/config.yaml and return its path.
+
+    config_data may be a dict (dumped as YAML) or a literal YAML string.
+    """
+    grafanactl_dir = config_dir / "grafanactl"
+    grafanactl_dir.mkdir(parents=True, exist_ok=True)
+    config_file = grafanactl_dir / "config.yaml"
+    if not isinstance(config_data, str):
+        config_data = yaml.dump(config_data)
+    config_file.write_text(config_data)
+    return config_file
+
+
+def write_config(home_dir, config_data):
+    """Write a grafanactl config file under home_dir/.config and return its path."""
+    return write_xdg_config(home_dir / ".config", config_data)
+
 
 class TestGrafanaConfigManager:
     """Tests for GrafanaConfigManager class."""
@@ -12,10 +37,6 @@ class TestGrafanaConfigManager:
     def test_config_from_xdg_config_home(self, monkeypatch, tmp_path):
         """Config should be read from XDG_CONFIG_HOME location."""
         config_dir = tmp_path / "config"
-        config_dir.mkdir()
-        grafanactl_dir = config_dir / "grafanactl"
-        grafanactl_dir.mkdir()
-        config_file = grafanactl_dir / "config.yaml"
 
         config_data = {
             "contexts": {
@@ -24,8 +45,7 @@ class TestGrafanaConfigManager:
                 },
             },
         }
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_xdg_config(config_dir, config_data)
 
         monkeypatch.setenv("XDG_CONFIG_HOME", str(config_dir))
         monkeypatch.delenv("HOME", raising=False)
@@ -39,10 +59,6 @@ class TestGrafanaConfigManager:
     def test_config_from_home_config(self, monkeypatch, tmp_path):
         """Config should be read from HOME/.config location."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
         config_data = {
             "contexts": {
@@ -51,8 +67,7 @@ class TestGrafanaConfigManager:
                 },
             },
         }
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, config_data)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -75,10 +90,6 @@ class TestGrafanaConfigManager:
     def test_context_not_found_exits(self, monkeypatch, tmp_path):
         """Should exit with error if context doesn't exist."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
         config_data = {
             "contexts": {
@@ -87,8 +98,7 @@ class TestGrafanaConfigManager:
                 },
             },
         }
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, config_data)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -101,10 +111,6 @@ class TestGrafanaConfigManager:
     def test_missing_required_fields_exits(self, monkeypatch, tmp_path):
         """Should exit with error if config is missing required fields."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
         config_data = {
             "contexts": {
@@ -116,8 +122,7 @@ class TestGrafanaConfigManager:
                 },
             },
         }
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, config_data)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -130,10 +135,6 @@ class TestGrafanaConfigManager:
     def test_context_from_init_param(self, monkeypatch, tmp_path):
         """Context passed to __init__ should be used."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
         config_data = {
             "contexts": {
@@ -142,8 +143,7 @@ class TestGrafanaConfigManager:
                 },
             },
         }
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, config_data)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -155,10 +155,6 @@ class TestGrafanaConfigManager:
     def test_context_from_current_context(self, monkeypatch, tmp_path):
         """Should fall back to current-context from config file."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
         config_data = {
             "current-context": "default-context",
@@ -168,8 +164,7 @@ class TestGrafanaConfigManager:
                 },
             },
         }
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, config_data)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -181,10 +176,6 @@ class TestGrafanaConfigManager:
     def test_init_param_takes_precedence(self, monkeypatch, tmp_path):
         """Context from __init__ should take precedence over current-context."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
         config_data = {
             "current-context": "default-context",
@@ -197,8 +188,7 @@ class TestGrafanaConfigManager:
                 },
             },
         }
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, config_data)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -210,14 +200,8 @@ class TestGrafanaConfigManager:
     def test_no_context_exits(self, monkeypatch, tmp_path):
         """Should exit if no context provided and no current-context in file."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
-        config_data = {"contexts": {}}
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, EMPTY_CONFIG_YAML)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -231,10 +215,6 @@ class TestGrafanaConfigManager:
         """Should check XDG_CONFIG_DIRS as fallback."""
         # Create config in XDG_CONFIG_DIRS location
         config_dir = tmp_path / "etc" / "xdg"
-        config_dir.mkdir(parents=True)
-        grafanactl_dir = config_dir / "grafanactl"
-        grafanactl_dir.mkdir()
-        config_file = grafanactl_dir / "config.yaml"
 
         config_data = {
             "contexts": {
@@ -243,8 +223,7 @@ class TestGrafanaConfigManager:
                 },
             },
         }
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_xdg_config(config_dir, config_data)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.delenv("HOME", raising=False)
@@ -257,10 +236,6 @@ class TestGrafanaConfigManager:
     def test_use_context(self, monkeypatch, tmp_path):
         """Should set current context."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
         config_data = {
             "contexts": {
@@ -268,8 +243,7 @@ class TestGrafanaConfigManager:
                 "ctx2": {"grafana": {"server": "https://server2.com", "user": "user", "password": "pass"}},
             },
         }
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, config_data)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -284,14 +258,8 @@ class TestGrafanaConfigManager:
     def test_use_context_not_found(self, monkeypatch, tmp_path):
         """Should exit if trying to use nonexistent context."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
-        config_data = {"contexts": {}}
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, EMPTY_CONFIG_YAML)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -304,10 +272,6 @@ class TestGrafanaConfigManager:
     def test_delete_context(self, monkeypatch, tmp_path):
         """Should delete context."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
         config_data = {
             "current-context": "ctx1",
@@ -316,8 +280,7 @@ class TestGrafanaConfigManager:
                 "ctx2": {"grafana": {"server": "https://server2.com", "user": "user", "password": "pass"}},
             },
         }
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, config_data)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -333,10 +296,6 @@ class TestGrafanaConfigManager:
     def test_delete_current_context_clears_current(self, monkeypatch, tmp_path):
         """Should clear current-context when deleting the current context."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
         config_data = {
             "current-context": "ctx1",
@@ -345,8 +304,7 @@ class TestGrafanaConfigManager:
                 "ctx2": {"grafana": {"server": "https://server2.com", "user": "user", "password": "pass"}},
             },
         }
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, config_data)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -361,10 +319,6 @@ class TestGrafanaConfigManager:
     def test_delete_last_context_clears_current(self, monkeypatch, tmp_path):
         """Should clear current-context when deleting last context."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
         config_data = {
             "current-context": "ctx1",
@@ -372,8 +326,7 @@ class TestGrafanaConfigManager:
                 "ctx1": {"grafana": {"server": "https://server1.com", "user": "user", "password": "pass"}},
             },
         }
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, config_data)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -388,14 +341,8 @@ class TestGrafanaConfigManager:
     def test_delete_context_not_found(self, monkeypatch, tmp_path):
         """Should exit if trying to delete nonexistent context."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
-        config_data = {"contexts": {}}
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, EMPTY_CONFIG_YAML)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -408,14 +355,8 @@ class TestGrafanaConfigManager:
     def test_set_value(self, monkeypatch, tmp_path):
         """Should set config value using dot notation."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
-        config_data = {"contexts": {}}
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, EMPTY_CONFIG_YAML)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -427,17 +368,28 @@ class TestGrafanaConfigManager:
         config = manager.load()
         assert config["contexts"]["newctx"]["grafana"]["server"] == "https://new.example.com"
 
+    def test_mutators_do_not_reread_config(self, monkeypatch, tmp_path):
+        """Mutating and then loading should parse the config file only once."""
+        home_dir = tmp_path / "home"
+        write_config(home_dir, EMPTY_CONFIG_YAML)
+
+        monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
+        monkeypatch.setenv("HOME", str(home_dir))
+
+        manager = GrafanaConfigManager()
+        with patch("yaml.load", wraps=yaml.load) as mock_load:
+            manager.set_value("contexts.newctx.grafana.server", "https://new.example.com")
+            manager.use_context("newctx")
+            config = manager.load()
+
+        assert mock_load.call_count == 1
+        assert config["current-context"] == "newctx"
+
     def test_set_value_org_id_as_int(self, monkeypatch, tmp_path):
         """Should convert org-id to integer."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
-        config_data = {"contexts": {}}
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, EMPTY_CONFIG_YAML)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -453,14 +405,8 @@ class TestGrafanaConfigManager:
     def test_set_value_invalid_org_id(self, monkeypatch, tmp_path):
         """Should exit if org-id is not a valid integer."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
-        config_data = {"contexts": {}}
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, EMPTY_CONFIG_YAML)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -473,14 +419,8 @@ class TestGrafanaConfigManager:
     def test_set_value_invalid_path(self, monkeypatch, tmp_path):
         """Should exit if path format is invalid."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
-        config_data = {"contexts": {}}
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, EMPTY_CONFIG_YAML)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -493,14 +433,8 @@ class TestGrafanaConfigManager:
     def test_add_context(self, monkeypatch, tmp_path):
         """Should add a new context."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
-        config_data = {"contexts": {}}
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, EMPTY_CONFIG_YAML)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -516,18 +450,27 @@ class TestGrafanaConfigManager:
         assert config["contexts"]["new-ctx"]["grafana"]["password"] == "secret"
         assert config["contexts"]["new-ctx"]["grafana"]["org-id"] == 2
 
+    def test_save_does_not_fold_long_values(self, monkeypatch, tmp_path):
+        """Long values should be written on a single line."""
+        home_dir = tmp_path / "home"
+        monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
+        monkeypatch.setenv("HOME", str(home_dir))
+
+        long_password = "word " * 50
+        manager = GrafanaConfigManager()
+        manager.add_context("ctx1", "https://grafana.example.com", "admin", long_password)
+
+        content = manager.config_path.read_text()
+        assert any(long_password.strip() in line for line in content.splitlines())
+        assert manager.reload()["contexts"]["ctx1"]["grafana"]["password"] == long_password
+
     def test_add_context_creates_contexts_key(self, monkeypatch, tmp_path):
         """Should create contexts key if missing."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
         # Config file with no contexts key
         config_data = {}
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, config_data)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -543,10 +486,6 @@ class TestGrafanaConfigManager:
     def test_list_contexts(self, monkeypatch, tmp_path):
         """Should list all context names."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
         config_data = {
             "contexts": {
@@ -554,8 +493,7 @@ class TestGrafanaConfigManager:
                 "ctx2": {"grafana": {"server": "https://server2.com", "user": "user", "password": "pass"}},
             },
         }
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, config_data)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -570,10 +508,6 @@ class TestGrafanaConfigManager:
     def test_get_current_context(self, monkeypatch, tmp_path):
         """Should get current context name."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
         config_data = {
             "current-context": "my-ctx",
@@ -581,8 +515,7 @@ class TestGrafanaConfigManager:
                 "my-ctx": {"grafana": {"server": "https://server.com", "user": "user", "password": "pass"}},
             },
         }
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, config_data)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -595,14 +528,8 @@ class TestGrafanaConfigManager:
     def test_get_current_context_none(self, monkeypatch, tmp_path):
         """Should return None when no current context."""
         home_dir = tmp_path / "home"
-        home_dir.mkdir()
-        config_dir = home_dir / ".config" / "grafanactl"
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / "config.yaml"
 
-        config_data = {"contexts": {}}
-        with open(config_file, "w") as f:
-            yaml.dump(config_data, f)
+        write_config(home_dir, EMPTY_CONFIG_YAML)
 
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
         monkeypatch.setenv("HOME", str(home_dir))
@@ -1,89 +1,156 @@
 """Tests for download_dashboards command."""
 
+import time
 from types import SimpleNamespace
-from unittest.mock import Mock, patch
+from unittest.mock import DEFAULT, Mock, patch
+
+import pytest
 
 from grafana_weaver.main import download_dashboards
-from grafana_weaver.core.client import GrafanaClient
 from grafana_weaver.core.dashboard_downloader import DashboardDownloader
 
 
+class _StubClient:
+    """In-memory DashboardSource that records which dashboards were fetched."""
+
+    def __init__(self, dashboards, get_dashboard):
+        self._dashboards = dashboards
+        self._get_dashboard = get_dashboard
+        self.fetched = []
+
+    def list_dashboards(self):
+        return self._dashboards
+
+    def get_dashboard(self, uid):
+        self.fetched.append(uid)
+        return self._get_dashboard(uid)
+
+
 class TestDashboardDownloader:
     """Tests for DashboardDownloader class."""
 
-    def test_successful_download(self, tmp_path):
-        """Successful download should download all dashboards."""
-        client = GrafanaClient("https://grafana.example.com", "admin", "secret")
-
-        with patch.object(client, "list_dashboards") as mock_list:
-            with patch.object(client, "get_dashboard") as mock_get:
-                # Mock list response
-                mock_list.return_value = [
-                    {"uid": "dash1", "title": "Dashboard 1", "folderTitle": ""},
-                    {"uid": "dash2", "title": "Dashboard 2", "folderTitle": "MyFolder"},
-                ]
-
-                # Mock dashboard responses
-                def get_dashboard_side_effect(uid):
-                    if uid == "dash1":
-                        return {
-                            "dashboard": {"title": "Dashboard 1", "panels": []},
-                            "meta": {"folderTitle": ""},
-                        }
-                    else:
-                        return {
-                            "dashboard": {"title": "Dashboard 2", "panels": []},
-                            "meta": {"folderTitle": "MyFolder"},
-                        }
-
-                mock_get.side_effect = get_dashboard_side_effect
-
-                downloader = DashboardDownloader(client)
-                downloaded_files = downloader.download_all(tmp_path)
-
-                # Verify dashboards were downloaded
-                assert (tmp_path / "dashboard-1.json").exists()
-                assert (tmp_path / "myfolder" / "dashboard-2.json").exists()
-                assert len(downloaded_files) == 2
-
-    def test_download_api_error(self, tmp_path):
+    def test_successful_download(self):
+        """Successful download should yield all dashboards at their folder paths."""
+
+        def get_dashboard(uid):
+            if uid == "dash1":
+                return {
+                    "dashboard": {"title": "Dashboard 1", "panels": []},
+                    "meta": {"folderTitle": ""},
+                }
+            return {
+                "dashboard": {"title": "Dashboard 2", "panels": []},
+                "meta": {"folderTitle": "MyFolder"},
+            }
+
+        client = _StubClient(
+            [
+                {"uid": "dash1", "title": "Dashboard 1", "folderTitle": ""},
+                {"uid": "dash2", "title": "Dashboard 2", "folderTitle": "MyFolder"},
+            ],
+            get_dashboard,
+        )
+
+        downloader = DashboardDownloader(client)
+        fetched = list(downloader.fetch_all())
+
+        assert [(p.as_posix(), d) for p, d in fetched] == [
+            ("dashboard-1.json", {"title": "Dashboard 1", "panels": []}),
+            ("myfolder/dashboard-2.json", {"title": "Dashboard 2", "panels": []}),
+        ]
+
+    def test_download_api_error(self):
         """API error should be handled gracefully."""
-        client = GrafanaClient("https://grafana.example.com", "admin", "secret")
 
-        with patch.object(client, "list_dashboards") as mock_list:
-            with patch.object(client, "get_dashboard") as mock_get:
-                mock_list.return_value = [{"uid": "dash1", "title": "Dashboard 1", "folderTitle": ""}]
+        def get_dashboard(uid):
+            raise Exception("API Error")
 
-                # Mock failed dashboard fetch
-                mock_get.side_effect = Exception("API Error")
+        client = _StubClient([{"uid": "dash1", "title": "Dashboard 1", "folderTitle": ""}], get_dashboard)
 
-                downloader = DashboardDownloader(client)
-                downloaded_files = downloader.download_all(tmp_path)
+        downloader = DashboardDownloader(client)
 
-                # Should continue despite error
-                # Dashboard should not be created
-                assert not (tmp_path / "dashboard-1.json").exists()
-                assert len(downloaded_files) == 0
+        # Should continue despite error, yielding nothing for the failed dashboard
+        assert list(downloader.fetch_all()) == []
 
-    def test_skip_general_folder(self, tmp_path):
+    def test_skip_general_folder(self):
         """Dashboards in General folder should not be in subfolder."""
-        client = GrafanaClient("https://grafana.example.com", "admin", "secret")
+        client = _StubClient(
+            [{"uid": "dash1", "title": "Dashboard", "folderTitle": "General"}],
+            lambda uid: {
+                "dashboard": {"title": "Dashboard", "panels": []},
+                "meta": {"folderTitle": "General"},
+            },
+        )
 
-        with patch.object(client, "list_dashboards") as mock_list:
-            with patch.object(client, "get_dashboard") as mock_get:
-                mock_list.return_value = [{"uid": "dash1", "title": "Dashboard", "folderTitle": "General"}]
+        downloader = DashboardDownloader(client)
 
-                mock_get.return_value = {
-                    "dashboard": {"title": "Dashboard", "panels": []},
-                    "meta": {"folderTitle": "General"},
-                }
+        # Dashboard should be in root, not in general/ subfolder
+        assert [p.as_posix() for p, _ in downloader.fetch_all()] == ["dashboard.json"]
+
+    def test_shared_folder(self):
+        """Dashboards sharing a folder should all land in one subdirectory."""
+        client = _StubClient(
+            [{"uid": f"dash{i}", "folderTitle": "Shared Folder"} for i in range(3)],
+            lambda uid: {"dashboard": {"title": uid, "panels": []}, "meta": {}},
+        )
+
+        downloader = DashboardDownloader(client)
+
+        assert [p.as_posix() for p, _ in downloader.fetch_all()] == [
+            "shared-folder/dash0.json",
+            "shared-folder/dash1.json",
+            "shared-folder/dash2.json",
+        ]
+
+    def test_download_preserves_list_order(self):
+        """Concurrently fetched dashboards should be yielded in list order."""
+        client = _StubClient(
+            [{"uid": f"dash{i}", "folderTitle": ""} for i in range(20)],
+            lambda uid: {"dashboard": {"title": uid, "panels": []}, "meta": {}},
+        )
+
+        downloader = DashboardDownloader(client)
+
+        assert [p.stem for p, _ in downloader.fetch_all()] == [f"dash{i}" for i in range(20)]
+        assert sorted(client.fetched) == sorted(f"dash{i}" for i in range(20))
+
+    def test_yields_overlap_fetches(self):
+        """Fetched dashboards should be yielded while later fetches are still running."""
+        yielded = []
+        seen_yielded = []
+
+        def get_dashboard(uid):
+            if uid == "dash1":
+                # Wait (bounded) for the first dashboard to reach the consumer
+                deadline = time.monotonic() + 5
+                while not yielded and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                seen_yielded.append(bool(yielded))
+            return {"dashboard": {"title": uid, "panels": []}, "meta": {}}
+
+        client = _StubClient([{"uid": "dash0", "folderTitle": ""}, {"uid": "dash1", "folderTitle": ""}], get_dashboard)
+
+        downloader = DashboardDownloader(client, max_workers=2)
+        for rel_path, _ in downloader.fetch_all():
+            yielded.append(rel_path.stem)
 
-                downloader = DashboardDownloader(client)
-                downloader.download_all(tmp_path)
+        assert seen_yielded == [True]
+        assert yielded == ["dash0", "dash1"]
 
-                # Dashboard should be in root, not in general/ subfolder
-                assert (tmp_path / "dashboard.json").exists()
-                assert not (tmp_path / "general").exists()
+    def test_fetch_all_yields_relative_paths(self, tmp_path):
+        """fetch_all should yield dashboards with their relative paths and write nothing."""
+        client = _StubClient(
+            [{"uid": "dash1", "folderTitle": ""}, {"uid": "dash2", "folderTitle": "MyFolder"}],
+            lambda uid: {"dashboard": {"title": uid, "panels": []}, "meta": {}},
+        )
+
+        downloader = DashboardDownloader(client)
+        fetched = list(downloader.fetch_all())
+
+        assert [(p.as_posix(), d["title"]) for p, d in fetched] == [
+            ("dash1.json", "dash1"),
+            ("myfolder/dash2.json", "dash2"),
+        ]
 
     def test_sanitize_name(self):
         """Sanitize name should handle special characters."""
@@ -95,13 +162,20 @@ class TestDashboardDownloader:
 class TestRun:
     """Tests for CLI run function."""
 
-    @patch("grafana_weaver.main.DashboardExtractor")
-    @patch("grafana_weaver.main.DashboardDownloader")
-    @patch("grafana_weaver.main.GrafanaClient")
-    @patch("grafana_weaver.main.GrafanaConfigManager")
-    @patch("grafana_weaver.main.tempfile.mkdtemp")
-    def test_main_success(self, mock_mkdtemp, mock_config_mgr, mock_client, mock_downloader, mock_extractor, tmp_path):
+    @patch.multiple(
+        "grafana_weaver.main",
+        DashboardExtractor=DEFAULT,
+        DashboardDownloader=DEFAULT,
+        GrafanaClient=DEFAULT,
+        GrafanaConfigManager=DEFAULT,
+    )
+    def test_main_success(self, tmp_path, **mocks):
         """Main should orchestrate download and extraction."""
+        mock_config_mgr = mocks["GrafanaConfigManager"]
+        mock_client = mocks["GrafanaClient"]
+        mock_downloader = mocks["DashboardDownloader"]
+        mock_extractor = mocks["DashboardExtractor"]
+
         dashboards_dir = tmp_path / "dashboards"
         dashboards_dir.mkdir()
 
@@ -115,31 +189,97 @@ class TestRun:
         }
         mock_config_mgr.return_value = mock_manager
 
-        # Mock temp directory
-        temp_dir = tmp_path / "temp"
-        temp_dir.mkdir()
-        mock_mkdtemp.return_value = str(temp_dir)
-
         # Mock client
         mock_client_instance = Mock()
         mock_client.return_value = mock_client_instance
 
         # Mock downloader
         mock_downloader_instance = Mock()
-        mock_downloader_instance.download_all.return_value = []
         mock_downloader.return_value = mock_downloader_instance
 
         # Mock extractor
         mock_extractor_instance = Mock()
+        mock_extractor_instance.extract_from_dashboards.return_value = True
         mock_extractor.return_value = mock_extractor_instance
 
         args = SimpleNamespace(
             dashboard_dir=dashboards_dir,
-            grafana_context="test-context"
+            grafana_context="test-context",
+            concurrency=4,
         )
         download_dashboards(args)
 
         # Verify workflow was called
         mock_config_mgr.assert_called_once_with(context="test-context")
         mock_manager.get_context.assert_called_once_with()
-        mock_downloader_instance.download_all.assert_called_once()
+        assert mock_client.call_args.kwargs["pool_maxsize"] == 4
+        mock_downloader.assert_called_once_with(mock_client_instance, max_workers=4)
+        mock_downloader_instance.fetch_all.assert_called_once()
+
+    @patch.multiple("grafana_weaver.main", GrafanaClient=DEFAULT, GrafanaConfigManager=DEFAULT)
+    def test_main_extracts_without_staging_files(self, tmp_path, **mocks):
+        """Fetched dashboards should go straight to the extractor, not via a temp dir."""
+        client = _StubClient(
+            [{"uid": "dash1", "folderTitle": ""}, {"uid": "dash2", "folderTitle": "MyFolder"}],
+            lambda uid: {"dashboard": {"uid": uid, "title": uid, "panels": []}, "meta": {}},
+        )
+        mocks["GrafanaClient"].return_value = client
+
+        dashboards_dir = tmp_path / "dashboards"
+        args = SimpleNamespace(
+            dashboard_dir=dashboards_dir,
+            grafana_context="test-context",
+            concurrency=4,
+        )
+        with patch("grafana_weaver.core.dashboard_downloader.Path.write_bytes") as mock_write:
+            download_dashboards(args)
+
+        mock_write.assert_not_called()
+        assert (dashboards_dir / "src" / "dash1.jsonnet").exists()
+        assert (dashboards_dir / "src" / "myfolder" / "dash2.jsonnet").exists()
+
+    @patch.multiple("grafana_weaver.main", GrafanaClient=DEFAULT, GrafanaConfigManager=DEFAULT)
+    def test_main_changed_dashboard_keeps_shared_asset(self, tmp_path, **mocks):
+        """A changed dashboard must not overwrite an asset shared with an unchanged one."""
+        scripts = {"dash1": "// EXTERNAL:shared.js\nfirst();", "dash2": "// EXTERNAL:shared.js\nfirst();"}
+
+        def get_dashboard(uid):
+            panel = {"id": 1, "type": "text", "options": {"script": scripts[uid]}}
+            return {"dashboard": {"uid": uid, "title": uid, "panels": [panel]}, "meta": {}}
+
+        mocks["GrafanaClient"].return_value = _StubClient(
+            [{"uid": "dash1", "folderTitle": ""}, {"uid": "dash2", "folderTitle": ""}],
+            get_dashboard,
+        )
+        dashboards_dir = tmp_path / "dashboards"
+        args = SimpleNamespace(dashboard_dir=dashboards_dir, grafana_context="ctx", concurrency=2)
+        download_dashboards(args)
+
+        # dash2 changes the shared asset; dash1 still uses the original content
+        scripts["dash2"] = "// EXTERNAL:shared.js\nsecond();"
+        download_dashboards(args)
+
+        assets_dir = dashboards_dir / "src" / "assets"
+        assert (assets_dir / "shared.js").read_text() == "// EXTERNAL:shared.js\nfirst();\n"
+        assert (assets_dir / "shared.js.conflict1").read_text() == "// EXTERNAL:shared.js\nsecond();\n"
+
+    @patch.multiple(
+        "grafana_weaver.main",
+        DashboardExtractor=DEFAULT,
+        DashboardDownloader=DEFAULT,
+        GrafanaClient=DEFAULT,
+        GrafanaConfigManager=DEFAULT,
+    )
+    def test_main_extraction_failure(self, tmp_path, **mocks):
+        """Extraction failure should exit with an error."""
+        mocks["DashboardExtractor"].return_value.extract_from_dashboards.return_value = False
+
+        args = SimpleNamespace(
+            dashboard_dir=tmp_path / "dashboards",
+            grafana_context="test-context",
+            concurrency=4,
+        )
+        with pytest.raises(SystemExit) as exc_info:
+            download_dashboards(args)
+
+        assert exc_info.value.code == 1
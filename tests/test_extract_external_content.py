@@ -1,119 +1,133 @@
 """Tests for extract_external_content command."""
 
 import json
-from unittest.mock import patch, Mock
+import os
+import stat
+from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
 from types import SimpleNamespace
 
 from grafana_weaver.main import extract_external_content
-from grafana_weaver.core.dashboard_extractor import DashboardExtractor
+from grafana_weaver.core.dashboard_extractor import DashboardExtractor, _hash_content
+
+
+@pytest.fixture(scope="module")
+def extractor(tmp_path_factory):
+    """One extractor shared by the tests of its pure helper methods."""
+    return DashboardExtractor(tmp_path_factory.mktemp("weaver"))
 
 
 class TestDashboardExtractor:
     """Tests for DashboardExtractor class."""
 
-    def test_compute_hash(self, tmp_path):
+    def test_compute_hash(self, extractor):
         """Same content should produce same hash."""
-        extractor = DashboardExtractor(tmp_path)
         content1 = "SELECT * FROM table"
         content2 = "SELECT * FROM table"
         assert extractor._compute_hash(content1) == extractor._compute_hash(content2)
 
-    def test_different_content_different_hash(self, tmp_path):
+    def test_different_content_different_hash(self, extractor):
         """Different content should produce different hash."""
-        extractor = DashboardExtractor(tmp_path)
         content1 = "SELECT * FROM table1"
         content2 = "SELECT * FROM table2"
         assert extractor._compute_hash(content1) != extractor._compute_hash(content2)
 
-    def test_hash_length(self, tmp_path):
+    def test_hash_length(self, extractor):
         """Hash should be 16 characters (truncated SHA-256)."""
-        extractor = DashboardExtractor(tmp_path)
         content = "test content"
         hash_value = extractor._compute_hash(content)
         assert len(hash_value) == 16
 
+    def test_hash_memoized(self, extractor, tmp_path):
+        """Repeated content should be served from the hash cache."""
+        content = f"SELECT * FROM {tmp_path.name}"
+
+        first = extractor._compute_hash(content)
+        hits_before = _hash_content.cache_info().hits
+        second = extractor._compute_hash(content)
+
+        assert first == second
+        assert _hash_content.cache_info().hits == hits_before + 1
+
 
 class TestParseExternalParams:
     """Tests for parse_external_params method."""
 
-    def test_no_params(self, tmp_path):
+    def test_no_params(self, extractor):
         """Line without parameters should return None."""
-        extractor = DashboardExtractor(tmp_path)
         line = "// EXTERNAL"
         assert extractor._parse_external_params(line) is None
 
-    def test_with_params(self, tmp_path):
+    def test_with_params(self, extractor):
         """Line with parameters should return parsed dict."""
-        extractor = DashboardExtractor(tmp_path)
         line = "// EXTERNAL({panel_id: 'weekly-results', key: 'params'})"
         params = extractor._parse_external_params(line)
         assert params["panel_id"] == "weekly-results"
         assert params["key"] == "params"
 
-    def test_quoted_values(self, tmp_path):
+    def test_quoted_values(self, extractor):
         """Quoted values should be parsed correctly."""
-        extractor = DashboardExtractor(tmp_path)
         line = '// EXTERNAL({panel_id:"weekly-results", key:"params"})'
         params = extractor._parse_external_params(line)
         assert params["panel_id"] == "weekly-results"
         assert params["key"] == "params"
 
+    def test_malformed_braces(self, extractor):
+        """Unbalanced or empty parameter braces should return None."""
+        assert extractor._parse_external_params("// EXTERNAL({panel_id: 'x')") is None
+        assert extractor._parse_external_params("// EXTERNAL(panel_id: 'x'})") is None
+        assert extractor._parse_external_params("// EXTERNAL({})") is None
+
 
 class TestDetermineFileExtension:
     """Tests for determine_file_extension method."""
 
-    def test_javascript_detection(self, tmp_path):
+    def test_javascript_detection(self, extractor):
         """JavaScript content should return .js extension."""
-        extractor = DashboardExtractor(tmp_path)
         assert extractor._determine_file_extension("function foo() {}") == ".js"
         assert extractor._determine_file_extension("const x = 1;") == ".js"
         assert extractor._determine_file_extension("// comment\nfunction bar() {}") == ".js"
+        assert extractor._determine_file_extension("RETURN { a: 1 }") == ".js"
+        assert extractor._determine_file_extension("SELECT x FROM t -- a => b") == ".js"
 
-    def test_sql_detection(self, tmp_path):
+    def test_sql_detection(self, extractor):
         """SQL content should return .sql extension."""
-        extractor = DashboardExtractor(tmp_path)
         assert extractor._determine_file_extension("SELECT * FROM table") == ".sql"
         assert extractor._determine_file_extension("select id from users") == ".sql"
 
-    def test_html_detection(self, tmp_path):
+    def test_html_detection(self, extractor):
         """HTML content should return .html extension."""
-        extractor = DashboardExtractor(tmp_path)
         assert extractor._determine_file_extension("<div>test</div>") == ".html"
         assert extractor._determine_file_extension("<html><body></body></html>") == ".html"
 
-    def test_markdown_detection(self, tmp_path):
+    def test_markdown_detection(self, extractor):
         """Markdown content should return .md extension."""
-        extractor = DashboardExtractor(tmp_path)
         assert extractor._determine_file_extension("# Header") == ".md"
         assert extractor._determine_file_extension("## Subheader") == ".md"
 
-    def test_fallback_to_txt(self, tmp_path):
+    def test_fallback_to_txt(self, extractor):
         """Unknown content should return .txt extension."""
-        extractor = DashboardExtractor(tmp_path)
         assert extractor._determine_file_extension("random text content") == ".txt"
 
 
 class TestExtractFilenameFromLine:
     """Tests for extract_filename_from_line method."""
 
-    def test_no_filename(self, tmp_path):
+    def test_no_filename(self, extractor):
         """Line without filename should return None."""
-        extractor = DashboardExtractor(tmp_path)
         line = "// EXTERNAL"
         assert extractor._extract_filename_from_line(line) is None
 
-    def test_simple_filename(self, tmp_path):
+    def test_simple_filename(self, extractor):
         """Simple filename should be extracted."""
-        extractor = DashboardExtractor(tmp_path)
         line = "// EXTERNAL:colors.js"
         assert extractor._extract_filename_from_line(line) == "colors.js"
 
-    def test_filename_with_params(self, tmp_path):
+    def test_filename_with_params(self, extractor):
         """Filename with parameters should be extracted."""
-        extractor = DashboardExtractor(tmp_path)
         line = "// EXTERNAL({key:'foo'}):data.sql"
         assert extractor._extract_filename_from_line(line) == "data.sql"
 
@@ -121,23 +135,20 @@ class TestExtractFilenameFromLine:
 class TestGenerateFilename:
     """Tests for generate_filename method."""
 
-    def test_dashboard_level_content(self, tmp_path):
+    def test_dashboard_level_content(self, extractor):
         """Dashboard-level content should not include panel ID."""
-        extractor = DashboardExtractor(tmp_path)
         root_data = {"uid": "dash123"}
         filename = extractor._generate_filename("SELECT * FROM foo", "query", root_data, "templating.query")
         assert filename == "dash123-query.sql"
 
-    def test_panel_level_content(self, tmp_path):
+    def test_panel_level_content(self, extractor):
         """Panel-level content should include panel ID."""
-        extractor = DashboardExtractor(tmp_path)
         root_data = {"uid": "dash123", "panels": [{"id": 5}]}
         filename = extractor._generate_filename("function() {}", "script", root_data, "panels[0].options.script")
         assert filename == "dash123-5-script.js"
 
-    def test_param_overrides(self, tmp_path):
+    def test_param_overrides(self, extractor):
         """Parameters should override generated values."""
-        extractor = DashboardExtractor(tmp_path)
         root_data = {"uid": "dash123"}
         params = {"dashboard_id": "custom", "key": "myquery", "ext": "txt"}
         filename = extractor._generate_filename("content", "query", root_data, "path", params)
@@ -147,24 +158,31 @@ class TestGenerateFilename:
 class TestSplitOnExternal:
     """Tests for split_on_external method."""
 
-    def test_single_external(self, tmp_path):
+    def test_single_external(self, extractor):
         """Single EXTERNAL marker should return one segment."""
-        extractor = DashboardExtractor(tmp_path)
         value = "// EXTERNAL\nfunction foo() {}"
         segments = extractor._split_on_external(value)
         assert len(segments) == 1
         assert segments[0][0] == "// EXTERNAL"
         assert "function foo()" in segments[0][1]
 
-    def test_multiple_externals(self, tmp_path):
+    def test_multiple_externals(self, extractor):
         """Multiple EXTERNAL markers should return multiple segments."""
-        extractor = DashboardExtractor(tmp_path)
         value = "// EXTERNAL:part1.js\nfunction foo() {}\n// EXTERNAL:part2.js\nfunction bar() {}"
         segments = extractor._split_on_external(value)
         assert len(segments) == 2
         assert "part1.js" in segments[0][0]
         assert "part2.js" in segments[1][0]
 
+    def test_segment_boundaries(self, extractor):
+        """Text before the first marker is dropped and content excludes marker lines."""
+        value = "preamble\n-- EXTERNAL:a.sql\nSELECT 1\n\n-- EXTERNAL:b.sql\n-- EXTERNAL:c.sql\nSELECT 3\n"
+        assert extractor._split_on_external(value) == [
+            ("-- EXTERNAL:a.sql", "SELECT 1\n"),
+            ("-- EXTERNAL:b.sql", ""),
+            ("-- EXTERNAL:c.sql", "SELECT 3\n"),
+        ]
+
 
 class TestExtractFromFile:
     """Tests for DashboardExtractor.extract_from_file method."""
@@ -211,6 +229,25 @@ class TestExtractFromFile:
         asset_files = list(assets_dir.glob("*.js"))
         assert len(asset_files) > 0
 
+    def test_rerun_leaves_unchanged_files_untouched(self, tmp_path):
+        """Re-extracting an unchanged dashboard should not rewrite its template or assets."""
+        dashboard_json = {
+            "uid": "test",
+            "panels": [{"id": 1, "options": {"script": "// EXTERNAL\nfunction foo() {}"}}],
+        }
+        json_file = tmp_path / "dashboard.json"
+        json_file.write_text(json.dumps(dashboard_json))
+
+        output_dir = tmp_path / "output"
+        assert DashboardExtractor(output_dir).extract_from_file(json_file)
+
+        written = [output_dir / "src" / "dashboard.jsonnet", *(output_dir / "src" / "assets").iterdir()]
+        for path in written:
+            os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+        assert DashboardExtractor(output_dir).extract_from_file(json_file)
+        assert [path.stat().st_mtime_ns for path in written] == [1_000_000_000] * len(written)
+
     def test_extract_nonexistent_file(self, tmp_path):
         """Nonexistent file should return False."""
         output_dir = tmp_path / "output"
@@ -229,29 +266,242 @@ class TestExtractFromFile:
         success = extractor.extract_from_file(json_file)
         assert not success
 
+    def test_extract_utf8_bom_dashboard(self, tmp_path):
+        """Dashboards saved with a UTF-8 BOM and non-ASCII text should be parsed."""
+        dashboard_json = {"uid": "test", "title": "Température – 温度", "panels": []}
+
+        json_file = tmp_path / "dashboard.json"
+        json_file.write_bytes(b"\xef\xbb\xbf" + json.dumps(dashboard_json, ensure_ascii=False).encode("utf-8"))
+
+        output_dir = tmp_path / "output"
+        extractor = DashboardExtractor(output_dir)
+
+        assert extractor.extract_from_file(json_file)
+        jsonnet_file = output_dir / "src" / "dashboard.jsonnet"
+        assert "Température – 温度" in jsonnet_file.read_text(encoding="utf-8")
+
+    def test_assets_written_as_utf8(self, tmp_path):
+        """Non-ASCII asset content should be written as UTF-8 and detected as unchanged on re-run."""
+        dashboard_json = {
+            "uid": "test",
+            "panels": [{"id": 1, "content": "<!-- EXTERNAL -->\n<p>Température – 温度</p>"}],
+        }
+        json_file = tmp_path / "dashboard.json"
+        json_file.write_text(json.dumps(dashboard_json))
+
+        output_dir = tmp_path / "output"
+        assert DashboardExtractor(output_dir).extract_from_file(json_file)
+
+        asset_file = output_dir / "src" / "assets" / "test-1-content.html"
+        assert "Température – 温度" in asset_file.read_bytes().decode("utf-8")
+
+        extractor = DashboardExtractor(output_dir)
+        with patch.object(extractor, "_write_asset") as mock_write:
+            assert extractor.extract_from_file(json_file)
+        mock_write.assert_not_called()
+
+    def test_failed_asset_write_keeps_previous_content(self, tmp_path):
+        """An asset write that fails should leave the old asset intact and no temporary file."""
+        output_dir = tmp_path / "output"
+        assets_dir = output_dir / "src" / "assets"
+        assets_dir.mkdir(parents=True)
+        (assets_dir / "shared.js").write_text("// EXTERNAL:shared.js\nfunction old() {}\n")
+
+        dashboard_json = {"uid": "test", "panels": [{"id": 1, "script": "// EXTERNAL:shared.js\nfunction new() {}"}]}
+        json_file = tmp_path / "dashboard.json"
+        json_file.write_text(json.dumps(dashboard_json))
+
+        with patch("grafana_weaver.core.dashboard_extractor.os.replace", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                DashboardExtractor(output_dir).extract_from_file(json_file)
+
+        assert "old" in (assets_dir / "shared.js").read_text()
+        assert sorted(p.name for p in assets_dir.iterdir()) == ["shared.js"]
+
+    def test_asset_rewrite_keeps_permissions(self, tmp_path):
+        """Rewriting an asset should keep its mode rather than resetting it to the default."""
+        output_dir = tmp_path / "output"
+        assets_dir = output_dir / "src" / "assets"
+        assets_dir.mkdir(parents=True)
+        asset = assets_dir / "shared.js"
+        asset.write_text("// EXTERNAL:shared.js\nfunction old() {}\n")
+        asset.chmod(0o600)
+
+        dashboard_json = {"uid": "test", "panels": [{"id": 1, "script": "// EXTERNAL:shared.js\nfunction new() {}"}]}
+        json_file = tmp_path / "dashboard.json"
+        json_file.write_text(json.dumps(dashboard_json))
+
+        assert DashboardExtractor(output_dir).extract_from_file(json_file)
+
+        assert "new" in asset.read_text()
+        assert stat.S_IMODE(asset.stat().st_mode) == 0o600
+        assert sorted(p.name for p in assets_dir.iterdir()) == ["shared.js"]
+
+    def test_new_asset_follows_current_umask(self, tmp_path):
+        """A new asset should get the mode a plain open() gives under the umask in effect at write time."""
+        dashboard_json = {"uid": "test", "panels": [{"id": 1, "script": "// EXTERNAL:shared.js\nfunction foo() {}"}]}
+        json_file = tmp_path / "dashboard.json"
+        json_file.write_text(json.dumps(dashboard_json))
+
+        previous_umask = os.umask(0o027)
+        try:
+            assert DashboardExtractor(tmp_path / "output").extract_from_file(json_file)
+        finally:
+            os.umask(previous_umask)
+
+        asset = tmp_path / "output" / "src" / "assets" / "shared.js"
+        assert stat.S_IMODE(asset.stat().st_mode) == 0o640
+
+    def test_symlinked_asset_written_through_link(self, tmp_path):
+        """Rewriting a symlinked asset should update the link target and keep the link."""
+        output_dir = tmp_path / "output"
+        assets_dir = output_dir / "src" / "assets"
+        assets_dir.mkdir(parents=True)
+        target = tmp_path / "shared" / "shared.js"
+        target.parent.mkdir()
+        target.write_text("// EXTERNAL:shared.js\nfunction old() {}\n")
+        (assets_dir / "shared.js").symlink_to(target)
+
+        dashboard_json = {"uid": "test", "panels": [{"id": 1, "script": "// EXTERNAL:shared.js\nfunction new() {}"}]}
+        json_file = tmp_path / "dashboard.json"
+        json_file.write_text(json.dumps(dashboard_json))
+
+        assert DashboardExtractor(output_dir).extract_from_file(json_file)
+
+        assert (assets_dir / "shared.js").is_symlink()
+        assert "new" in target.read_text()
+        assert sorted(p.name for p in target.parent.iterdir()) == ["shared.js"]
+
+    def test_conflicting_content_goes_to_next_free_conflict_file(self, tmp_path):
+        """A second panel with different content for the same asset should not overwrite existing conflict files."""
+        output_dir = tmp_path / "output"
+        assets_dir = output_dir / "src" / "assets"
+        assets_dir.mkdir(parents=True)
+        (assets_dir / "shared.js.conflict1").write_text("old conflict\n")
+
+        dashboard_json = {
+            "uid": "test",
+            "panels": [
+                {"id": 1, "script": "// EXTERNAL:shared.js\nfunction foo() {}"},
+                {"id": 2, "script": "// EXTERNAL:shared.js\nfunction bar() {}"},
+            ],
+        }
+        json_file = tmp_path / "dashboard.json"
+        json_file.write_text(json.dumps(dashboard_json))
+
+        assert DashboardExtractor(output_dir).extract_from_file(json_file)
+
+        assert "foo" in (assets_dir / "shared.js").read_text()
+        assert (assets_dir / "shared.js.conflict1").read_text() == "old conflict\n"
+        assert "bar" in (assets_dir / "shared.js.conflict2").read_text()
+
+    def test_only_referenced_assets_are_read(self, tmp_path):
+        """Existing assets should only be hashed when a dashboard references them."""
+        output_dir = tmp_path / "output"
+        assets_dir = output_dir / "src" / "assets"
+        assets_dir.mkdir(parents=True)
+        (assets_dir / "unrelated.sql").write_text("SELECT 1\n")
+        (assets_dir / "shared.js").write_text("// EXTERNAL:shared.js\nfunction foo() {}\n")
+
+        dashboard_json = {"uid": "test", "panels": [{"id": 1, "script": "// EXTERNAL:shared.js\nfunction foo() {}"}]}
+        json_file = tmp_path / "dashboard.json"
+        json_file.write_text(json.dumps(dashboard_json))
+
+        extractor = DashboardExtractor(output_dir)
+        with patch.object(extractor, "_compute_hash", wraps=extractor._compute_hash) as mock_hash:
+            assert extractor.extract_from_file(json_file)
+
+        hashed = [c.args[0] for c in mock_hash.call_args_list]
+        assert "SELECT 1\n" not in hashed
+        assert extractor._asset_hashes["unrelated.sql"] is None
+
+    def test_only_first_line_markers_in_nested_values(self, tmp_path):
+        """Markers are found in nested dicts and lists, but only on a value's first line."""
+        dashboard_json = {
+            "uid": "test",
+            "panels": [
+                {
+                    "id": 7,
+                    "targets": [{"refId": "A", "rawSql": "-- EXTERNAL:query.sql\nSELECT 1 FROM t"}],
+                    "description": "see below\n// EXTERNAL not a marker",
+                },
+            ],
+        }
+        json_file = tmp_path / "dashboard.json"
+        json_file.write_text(json.dumps(dashboard_json))
+
+        extractor = DashboardExtractor(tmp_path / "output")
+        assert extractor.extract_from_file(json_file)
+
+        assert [(m["path"], m["filename"]) for m in extractor._modifications] == [
+            ("panels[0].targets[0].rawSql", "query.sql"),
+        ]
+
+    def test_new_assets_are_not_hashed(self, tmp_path):
+        """Assets with nothing on disk to compare against should be written without hashing."""
+        dashboard_json = {
+            "uid": "test",
+            "panels": [
+                {"id": 1, "script": "// EXTERNAL:shared.js\nfunction foo() {}"},
+                {"id": 2, "script": "// EXTERNAL:shared.js\nfunction foo() {}"},
+            ],
+        }
+        json_file = tmp_path / "dashboard.json"
+        json_file.write_text(json.dumps(dashboard_json))
+
+        extractor = DashboardExtractor(tmp_path / "output")
+        with patch.object(extractor, "_compute_hash") as mock_hash:
+            assert extractor.extract_from_file(json_file)
+
+        mock_hash.assert_not_called()
+        assert not list((tmp_path / "output" / "src" / "assets").glob("*.conflict*"))
+
+
+class TestExtractFromDashboards:
+    """Tests for DashboardExtractor.extract_from_dashboards method."""
+
+    def test_templates_follow_relative_paths(self, tmp_path):
+        """In-memory dashboards should be written under src/ at their relative paths."""
+        extractor = DashboardExtractor(tmp_path)
+
+        success = extractor.extract_from_dashboards(
+            [
+                (Path("top.json"), {"uid": "top", "panels": []}),
+                (Path("folder1/nested.json"), {"uid": "nested", "panels": []}),
+            ],
+        )
+
+        assert success
+        assert (tmp_path / "src" / "top.jsonnet").exists()
+        assert (tmp_path / "src" / "folder1" / "nested.jsonnet").exists()
+
+    def test_no_dashboards(self, tmp_path, capsys):
+        """An empty batch should succeed and say there was nothing to do."""
+        extractor = DashboardExtractor(tmp_path)
+
+        assert extractor.extract_from_dashboards(iter([]))
+        assert "No dashboards to process" in capsys.readouterr().out
+
 
 class TestCreateExternalLine:
     """Tests for create_external_line method."""
 
-    def test_add_filename_to_simple_external(self, tmp_path):
+    def test_add_filename_to_simple_external(self, extractor):
         """Filename should be added to simple EXTERNAL line."""
-        extractor = DashboardExtractor(tmp_path)
         line = "// EXTERNAL"
         result = extractor._create_external_line(line, "colors.js")
         assert "EXTERNAL:colors.js" in result
         assert result.startswith("//")
 
-    def test_replace_existing_filename(self, tmp_path):
+    def test_replace_existing_filename(self, extractor):
         """Existing filename should be replaced."""
-        extractor = DashboardExtractor(tmp_path)
         line = "// EXTERNAL:old.js"
         result = extractor._create_external_line(line, "new.js")
         assert "EXTERNAL:new.js" in result
         assert "old.js" not in result
 
-    def test_preserve_params(self, tmp_path):
+    def test_preserve_params(self, extractor):
         """Parameters should be preserved."""
-        extractor = DashboardExtractor(tmp_path)
         line = "// EXTERNAL({key:'foo'}):old.sql"
         result = extractor._create_external_line(line, "new.sql")
         assert "{key:'foo'}" in result
@@ -259,16 +509,38 @@ class TestCreateExternalLine:
         assert "old.sql" not in result
 
 
+class _FakeExtractor:
+    """Stand-in for DashboardExtractor that records extract_from_file calls."""
+
+    result = True
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self.calls = []
+
+    def extract_from_file(self, json_file, **kwargs):
+        self.calls.append((json_file, kwargs))
+        return self.result
+
+
+@pytest.fixture
+def fake_extractors(monkeypatch):
+    """Make the CLI build _FakeExtractor instances, returning the list of those created."""
+    created = []
+
+    def factory(root_dir):
+        created.append(_FakeExtractor(root_dir))
+        return created[-1]
+
+    monkeypatch.setattr("grafana_weaver.main.DashboardExtractor", factory)
+    return created
+
+
 class TestMain:
     """Tests for main CLI function."""
 
-    @patch("grafana_weaver.main.DashboardExtractor")
-    def test_main_success(self, mock_extractor_class, tmp_path):
+    def test_main_success(self, fake_extractors, tmp_path):
         """Should create DashboardExtractor and exit with 0 on success."""
-        mock_extractor = Mock()
-        mock_extractor.extract_from_file.return_value = True
-        mock_extractor_class.return_value = mock_extractor
-
         test_file = tmp_path / "dashboard.json"
         test_file.write_text("{}")
 
@@ -283,19 +555,15 @@ class TestMain:
         assert exc_info.value.code == 0
 
         # Verify DashboardExtractor was created with correct root_dir
-        mock_extractor_class.assert_called_once()
-        call_args = mock_extractor_class.call_args[0]
-        assert call_args[0] == tmp_path / "dashboards"
+        assert len(fake_extractors) == 1
+        assert fake_extractors[0].root_dir == tmp_path / "dashboards"
 
         # Verify extract_from_file was called
-        mock_extractor.extract_from_file.assert_called_once()
+        assert len(fake_extractors[0].calls) == 1
 
-    @patch("grafana_weaver.main.DashboardExtractor")
-    def test_main_failure(self, mock_extractor_class, tmp_path):
+    def test_main_failure(self, fake_extractors, monkeypatch, tmp_path):
         """Should exit with 1 on failure."""
-        mock_extractor = Mock()
-        mock_extractor.extract_from_file.return_value = False
-        mock_extractor_class.return_value = mock_extractor
+        monkeypatch.setattr(_FakeExtractor, "result", False)
 
         test_file = tmp_path / "dashboard.json"
         test_file.write_text("{}")
@@ -333,13 +601,8 @@ class TestMain:
         # Verify template was created in the specified directory
         assert (custom_dir / "src" / "dashboard.jsonnet").exists()
 
-    @patch("grafana_weaver.main.DashboardExtractor")
-    def test_main_with_base_dir(self, mock_extractor_class, tmp_path):
+    def test_main_with_base_dir(self, fake_extractors, tmp_path):
         """Should pass through base_dir option to extract_from_file."""
-        mock_extractor = Mock()
-        mock_extractor.extract_from_file.return_value = True
-        mock_extractor_class.return_value = mock_extractor
-
         test_file = tmp_path / "dashboard.json"
         test_file.write_text("{}")
 
@@ -356,6 +619,5 @@ class TestMain:
             extract_external_content(args)
 
         # Verify extract_from_file was called with base_dir
-        mock_extractor.extract_from_file.assert_called_once()
-        call_kwargs = mock_extractor.extract_from_file.call_args[1]
-        assert call_kwargs["base_dir"] == base_dir
+        assert len(fake_extractors[0].calls) == 1
+        assert fake_extractors[0].calls[0][1]["base_dir"] == base_dir
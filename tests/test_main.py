@@ -1,5 +1,8 @@
 """Tests for main CLI entrypoint."""
 
+import subprocess
+import sys
+
 import pytest
 from unittest.mock import Mock, patch
 
@@ -20,6 +23,17 @@ class TestMainCLI:
         assert "grafana-weaver" in captured.err  # argparse prints errors to stderr
         assert "required: command" in captured.err
 
+    def test_version(self, capsys):
+        """--version should print the installed package version and exit."""
+        with (
+            patch("sys.argv", ["grafana-weaver", "--version"]),
+            patch("grafana_weaver.main.get_version", return_value="1.2.3"),
+        ):
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+        assert exc_info.value.code == 0
+        assert capsys.readouterr().out == "grafana-weaver 1.2.3\n"
+
     @patch("grafana_weaver.main.upload_dashboards")
     def test_upload_command(self, mock_run, tmp_path):
         """Should call upload_dashboards.run() with parsed args."""
@@ -33,6 +47,7 @@ class TestMainCLI:
         args = mock_run.call_args[0][0]
         assert args.command == "upload"
         assert args.dashboard_dir == dashboards_dir
+        assert args.concurrency == 8
 
     @patch("grafana_weaver.main.download_dashboards")
     def test_download_command(self, mock_run, tmp_path):
@@ -47,6 +62,55 @@ class TestMainCLI:
         args = mock_run.call_args[0][0]
         assert args.command == "download"
         assert args.dashboard_dir == dashboards_dir
+        assert args.concurrency == 8
+
+    @pytest.mark.parametrize(
+        ("command", "env_var", "env_value", "expected"),
+        [
+            ("download", "GRAFANA_DOWNLOAD_CONCURRENCY", "3", 3),
+            ("upload", "GRAFANA_UPLOAD_CONCURRENCY", "2", 2),
+        ],
+        ids=["download-concurrency", "upload-concurrency"],
+    )
+    def test_concurrency_env_default(self, monkeypatch, command, env_var, env_value, expected):
+        """--concurrency should default to the command's environment variable."""
+        monkeypatch.setenv(env_var, env_value)
+
+        with patch("sys.argv", ["grafana-weaver", command]):
+            with patch(f"grafana_weaver.main.{command}_dashboards") as mock_run:
+                main()
+
+        args = mock_run.call_args[0][0]
+        assert args.concurrency == expected
+
+    @pytest.mark.parametrize("command", ["download", "upload"])
+    @pytest.mark.parametrize("value", ["0", "-2", "abc"])
+    def test_concurrency_rejects_invalid(self, capsys, command, value):
+        """--concurrency must be a positive integer, reported as a usage error."""
+        with patch("sys.argv", ["grafana-weaver", command, "--concurrency", value]):
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+        assert exc_info.value.code == 2
+        assert f"must be a positive integer, got '{value}'" in capsys.readouterr().err
+
+    @pytest.mark.parametrize(
+        ("command", "env_var"),
+        [("download", "GRAFANA_DOWNLOAD_CONCURRENCY"), ("upload", "GRAFANA_UPLOAD_CONCURRENCY")],
+    )
+    def test_invalid_concurrency_env_only_affects_its_command(self, monkeypatch, capsys, command, env_var):
+        """A bad concurrency env var should fail its command cleanly and leave other commands alone."""
+        monkeypatch.setenv(env_var, "abc")
+
+        with patch("sys.argv", ["grafana-weaver", command]):
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+        assert exc_info.value.code == 2
+        assert "argument --concurrency: must be a positive integer, got 'abc'" in capsys.readouterr().err
+
+        with patch("sys.argv", ["grafana-weaver", "config", "list"]):
+            with patch("grafana_weaver.main.config_list") as mock_config_list:
+                main()
+        mock_config_list.assert_called_once()
 
     @patch("grafana_weaver.main.extract_external_content")
     def test_extract_command(self, mock_run, tmp_path):
@@ -109,3 +173,13 @@ class TestMainCLI:
         args = mock_run.call_args[0][0]
         assert args.dashboard_dir == dashboards_dir
         assert args.grafana_context == "test-context"
+
+    def test_import_defers_heavy_dependencies(self):
+        """Importing the CLI should not load requests, PyYAML, multiprocessing or package metadata until needed."""
+        code = (
+            "import sys, grafana_weaver.main; "
+            "heavy = ('requests', 'yaml', 'multiprocessing', 'importlib.metadata'); "
+            "print(sorted(m for m in heavy if m in sys.modules))"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == "[]"
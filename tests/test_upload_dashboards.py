@@ -1,80 +1,192 @@
 """Tests for upload_dashboards command."""
 
+import json
+import threading
+from pathlib import Path
 from types import SimpleNamespace
 from unittest.mock import Mock, patch
 
 import pytest
 
 from grafana_weaver.main import upload_dashboards
-from grafana_weaver.core.client import GrafanaClient
+from grafana_weaver.core.client import POOL_MAXSIZE, GrafanaClient
 from grafana_weaver.core.jsonnet_builder import JsonnetBuilder
 
 
+@pytest.fixture
+def mock_evaluate(monkeypatch):
+    """Replace jsonnet evaluation with a Mock; tests set its return_value or side_effect."""
+    mock = Mock(return_value="{}")
+    monkeypatch.setattr("grafana_weaver.core.jsonnet_builder._jsonnet.evaluate_file", mock)
+    return mock
+
+
 class TestJsonnetBuilder:
     """Tests for JsonnetBuilder class."""
 
-    @patch("grafana_weaver.core.jsonnet_builder._jsonnet.evaluate_file")
-    def test_build_single_dashboard(self, mock_evaluate, tmp_path):
+    def test_build_single_dashboard(self, mock_evaluate, jsonnet_src_tree):
         """Single dashboard should be built correctly."""
-        # Create dashboards structure
-        src_dir = tmp_path / "src"
-        src_dir.mkdir()
-
-        jsonnet_file = src_dir / "test.jsonnet"
-        jsonnet_file.write_text('{"uid": "test", "title": "Test Dashboard"}')
+        jsonnet_file = jsonnet_src_tree.make_jsonnet("test.jsonnet", '{"uid": "test", "title": "Test Dashboard"}')
 
         # Mock jsonnet evaluation to return valid JSON
         mock_evaluate.return_value = '{"uid": "test", "title": "Test Dashboard"}'
 
-        builder = JsonnetBuilder(tmp_path)
+        builder = JsonnetBuilder(jsonnet_src_tree.root)
         built_files = builder.build_all()
 
-        # Check that jsonnet evaluate_file was called
-        assert mock_evaluate.called
-        assert str(jsonnet_file) in str(mock_evaluate.call_args)
+        # Check that jsonnet evaluate_file was called on the template
+        mock_evaluate.assert_called_once_with(str(jsonnet_file))
 
         # Check that output file was created
-        output_file = tmp_path / "build" / "test.json"
+        output_file = jsonnet_src_tree.build_dir / "test.json"
         assert output_file.exists()
         assert len(built_files) == 1
 
-    @patch("grafana_weaver.core.jsonnet_builder._jsonnet.evaluate_file")
-    def test_build_nested_dashboard(self, mock_evaluate, tmp_path):
-        """Nested dashboard should preserve folder structure."""
-        src_dir = tmp_path / "src"
-        nested_dir = src_dir / "folder1" / "folder2"
-        nested_dir.mkdir(parents=True)
+    def test_build_output_is_pretty_printed(self, mock_evaluate, jsonnet_src_tree):
+        """Built JSON should be written with two-space indentation."""
+        jsonnet_src_tree.make_jsonnet("test.jsonnet", "{}")
+
+        mock_evaluate.return_value = '{"uid":"test","panels":[{"id":1}]}'
 
-        jsonnet_file = nested_dir / "nested.jsonnet"
-        jsonnet_file.write_text('{"uid": "nested"}')
+        JsonnetBuilder(jsonnet_src_tree.root).build_all()
+
+        output_file = jsonnet_src_tree.build_dir / "test.json"
+        assert output_file.read_text() == json.dumps({"uid": "test", "panels": [{"id": 1}]}, indent=2)
+
+    def test_build_nested_dashboard(self, mock_evaluate, jsonnet_src_tree):
+        """Nested dashboard should preserve folder structure."""
+        jsonnet_src_tree.make_jsonnet("folder1/folder2/nested.jsonnet", '{"uid": "nested"}')
 
         # Mock jsonnet evaluation
         mock_evaluate.return_value = '{"uid": "nested"}'
 
-        builder = JsonnetBuilder(tmp_path)
+        builder = JsonnetBuilder(jsonnet_src_tree.root)
         builder.build_all()
 
         # Check that nested output directory was created
-        output_file = tmp_path / "build" / "folder1" / "folder2" / "nested.json"
+        output_file = jsonnet_src_tree.build_dir / "folder1" / "folder2" / "nested.json"
         assert output_file.exists()
 
-    @patch("grafana_weaver.core.jsonnet_builder._jsonnet.evaluate_file")
-    def test_build_jsonnet_error(self, mock_evaluate, tmp_path):
-        """Jsonnet build error should exit with error code."""
-        src_dir = tmp_path / "src"
-        src_dir.mkdir()
+    def test_build_creates_each_output_dir_once(self, mock_evaluate, jsonnet_src_tree, monkeypatch):
+        """Dashboards sharing a folder should not re-create its build directory."""
+        for i in range(3):
+            jsonnet_src_tree.make_jsonnet(f"folder/dash{i}.jsonnet", "{}")
+        jsonnet_src_tree.make_jsonnet("top.jsonnet", "{}")
+        jsonnet_src_tree.build_dir.mkdir()
+
+        created = []
+        real_mkdir = Path.mkdir
+        monkeypatch.setattr(Path, "mkdir", lambda self, *a, **kw: created.append(self) or real_mkdir(self, *a, **kw))
+
+        JsonnetBuilder(jsonnet_src_tree.root, max_workers=1).build_all()
+
+        build_dir = jsonnet_src_tree.build_dir
+        assert sorted(created) == [build_dir, build_dir / "folder"]
+        assert len(list((build_dir / "folder").iterdir())) == 3
+
+    def test_build_many_dashboards_in_parallel(self, jsonnet_src_tree):
+        """Several dashboards should all be built when fanned out across processes."""
+        for i in range(4):
+            jsonnet_src_tree.make_jsonnet(f"dash{i}.jsonnet", f'{{"uid": "dash{i}", "panels": [{{"id": {i} + 1}}]}}')
+        jsonnet_src_tree.make_jsonnet("folder/nested.jsonnet", '{"uid": "nested"}')
+
+        built_files = JsonnetBuilder(jsonnet_src_tree.root, max_workers=2).build_all()
+
+        build_dir = jsonnet_src_tree.build_dir
+        assert sorted(f.relative_to(build_dir).as_posix() for f in built_files) == [
+            "dash0.json",
+            "dash1.json",
+            "dash2.json",
+            "dash3.json",
+            "folder/nested.json",
+        ]
+        assert json.loads((build_dir / "dash2.json").read_text()) == {"uid": "dash2", "panels": [{"id": 3}]}
+
+    @pytest.mark.parametrize(
+        ("max_workers", "cpu_count", "expected_workers"),
+        [(None, 64, 2), (8, 64, 2), (None, 1, None), (1, 64, None)],
+        ids=["cpus-capped-by-files", "explicit-capped-by-files", "single-cpu-in-process", "one-worker-in-process"],
+    )
+    def test_build_worker_count(
+        self,
+        mock_evaluate,
+        jsonnet_src_tree,
+        monkeypatch,
+        max_workers,
+        cpu_count,
+        expected_workers,
+    ):
+        """No more build processes should start than there are templates or CPUs."""
+        jsonnet_src_tree.make_jsonnet("a.jsonnet", "{}")
+        jsonnet_src_tree.make_jsonnet("b.jsonnet", "{}")
+        monkeypatch.setattr("grafana_weaver.core.jsonnet_builder.os.cpu_count", lambda: cpu_count)
+
+        pools = []
+
+        class RecordingPool:
+            """Runs the work in-process, recording the requested worker count."""
+
+            def __init__(self, max_workers):
+                pools.append(max_workers)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def map(self, fn, items):
+                return map(fn, items)
+
+        monkeypatch.setattr("concurrent.futures.ProcessPoolExecutor", RecordingPool)
+
+        built_files = JsonnetBuilder(jsonnet_src_tree.root, max_workers=max_workers).build_all()
 
-        jsonnet_file = src_dir / "bad.jsonnet"
-        jsonnet_file.write_text("invalid jsonnet")
+        assert len(built_files) == 2
+        assert pools == ([] if expected_workers is None else [expected_workers])
+
+    def test_build_jsonnet_error(self, mock_evaluate, jsonnet_src_tree):
+        """Jsonnet build error should exit with error code."""
+        jsonnet_src_tree.make_jsonnet("bad.jsonnet", "invalid jsonnet")
 
         # Mock failed jsonnet execution
         mock_evaluate.side_effect = RuntimeError("Syntax error")
 
-        builder = JsonnetBuilder(tmp_path)
+        builder = JsonnetBuilder(jsonnet_src_tree.root)
         with pytest.raises(SystemExit) as exc_info:
             builder.build_all()
         assert exc_info.value.code == 1
 
+    def test_build_json_decode_error(self, jsonnet_src_tree, monkeypatch, capsys):
+        """Jsonnet output that is not valid JSON should exit with error code."""
+        jsonnet_src_tree.make_jsonnet("bad.jsonnet", "{}")
+        monkeypatch.setattr("grafana_weaver.core.jsonnet_builder._jsonnet.evaluate_file", lambda path: "not json")
+
+        with pytest.raises(SystemExit) as exc_info:
+            JsonnetBuilder(jsonnet_src_tree.root).build_all()
+        assert exc_info.value.code == 1
+        assert "Error parsing JSON from" in capsys.readouterr().out
+
+    def test_get_built_files_nested(self, tmp_path):
+        """Built files should be found at any depth, ignoring other file types."""
+        build_dir = tmp_path / "build"
+        (build_dir / "folder1" / "folder2").mkdir(parents=True)
+        (build_dir / "top.json").write_text("{}")
+        (build_dir / "folder1" / "folder2" / "nested.json").write_text("{}")
+        (build_dir / "folder1" / "notes.txt").write_text("")
+
+        built_files = JsonnetBuilder(tmp_path).get_built_files()
+
+        assert sorted(f.relative_to(build_dir).as_posix() for f in built_files) == [
+            "folder1/folder2/nested.json",
+            "top.json",
+        ]
+
+    def test_missing_src_dir(self, tmp_path, capsys):
+        """Missing src directory should be reported like an empty one."""
+        assert JsonnetBuilder(tmp_path).build_all() == []
+        assert "No .jsonnet files found" in capsys.readouterr().out
+
     def test_no_jsonnet_files(self, tmp_path, capsys):
         """Empty src directory should complete without error."""
         src_dir = tmp_path / "src"
@@ -88,20 +200,33 @@ class TestJsonnetBuilder:
         assert len(built_files) == 0
 
 
+def _response(*, content=b"", json_data=None, error=None):
+    """Cheap stand-in for a requests.Response; json_data is encoded as its body, and raise_for_status raises error."""
+
+    def raise_for_status():
+        if error is not None:
+            raise error
+
+    if json_data is not None:
+        content = json.dumps(json_data).encode()
+    return SimpleNamespace(content=content, raise_for_status=raise_for_status)
+
+
+@pytest.fixture(scope="module")
+def grafana_client():
+    """One client shared by the client tests; each patches its session methods only for the call under test."""
+    return GrafanaClient("https://grafana.example.com", "admin", "secret")
+
+
 class TestGrafanaClient:
     """Tests for GrafanaClient class."""
 
-    def test_upload_dashboard_success(self):
+    def test_upload_dashboard_success(self, grafana_client):
         """Successful upload should return response."""
-        client = GrafanaClient("https://grafana.example.com", "admin", "secret")
+        with patch.object(grafana_client._session, "post") as mock_post:
+            mock_post.return_value = _response(json_data={"status": "success", "uid": "dash1"})
 
-        with patch("grafana_weaver.core.client.requests.post") as mock_post:
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = {"status": "success", "uid": "dash1"}
-            mock_post.return_value = mock_response
-
-            result = client.upload_dashboard({"uid": "dash1", "title": "Dashboard 1"})
+            result = grafana_client.upload_dashboard({"uid": "dash1", "title": "Dashboard 1"})
 
             assert result["status"] == "success"
             assert mock_post.called
@@ -110,56 +235,79 @@ class TestGrafanaClient:
             assert call_args[0][0] == "https://grafana.example.com/api/dashboards/db"
             assert "Authorization" in call_args[1]["headers"]
 
-    def test_upload_dashboard_error(self):
+    def test_upload_dashboard_error(self, grafana_client):
         """Failed upload should raise HTTPError."""
-        client = GrafanaClient("https://grafana.example.com", "admin", "secret")
-
-        with patch("grafana_weaver.core.client.requests.post") as mock_post:
-            mock_response = Mock()
-            mock_response.status_code = 500
-            mock_response.raise_for_status.side_effect = Exception("Server error")
-            mock_post.return_value = mock_response
+        with patch.object(grafana_client._session, "post") as mock_post:
+            mock_post.return_value = _response(error=Exception("Server error"))
 
             with pytest.raises(Exception):
-                client.upload_dashboard({"uid": "dash", "title": "Dashboard"})
+                grafana_client.upload_dashboard({"uid": "dash", "title": "Dashboard"})
 
-    def test_list_dashboards(self):
+    def test_list_dashboards(self, grafana_client):
         """List dashboards should return dashboard list."""
-        client = GrafanaClient("https://grafana.example.com", "admin", "secret")
+        with patch.object(grafana_client._session, "get") as mock_get:
+            mock_get.return_value = _response(content=json.dumps([{"uid": "dash1"}, {"uid": "dash2"}]).encode())
 
-        with patch("grafana_weaver.core.client.requests.get") as mock_get:
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = [{"uid": "dash1"}, {"uid": "dash2"}]
-            mock_get.return_value = mock_response
-
-            dashboards = client.list_dashboards()
+            dashboards = grafana_client.list_dashboards()
 
             assert len(dashboards) == 2
             assert dashboards[0]["uid"] == "dash1"
 
-    def test_get_dashboard(self):
-        """Get dashboard should return specific dashboard."""
-        client = GrafanaClient("https://grafana.example.com", "admin", "secret")
+    def test_list_dashboards_paginates(self, grafana_client):
+        """List dashboards should keep requesting pages until a short page."""
+        pages = [[{"uid": "dash1"}, {"uid": "dash2"}], [{"uid": "dash3"}]]
+        responses = [_response(content=json.dumps(page).encode()) for page in pages]
 
-        with patch("grafana_weaver.core.client.requests.get") as mock_get:
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = {"dashboard": {"uid": "dash1", "title": "Dashboard 1"}}
-            mock_get.return_value = mock_response
+        with (
+            patch("grafana_weaver.core.client.SEARCH_PAGE_SIZE", 2),
+            patch.object(grafana_client._session, "get", side_effect=responses) as mock_get,
+        ):
+            dashboards = grafana_client.list_dashboards()
 
-            result = client.get_dashboard("dash1")
+        assert [d["uid"] for d in dashboards] == ["dash1", "dash2", "dash3"]
+        assert [c.kwargs["params"]["page"] for c in mock_get.call_args_list] == [1, 2]
+        assert mock_get.call_args.kwargs["params"]["limit"] == 2
+
+    def test_get_dashboard(self, grafana_client):
+        """Get dashboard should return specific dashboard."""
+        with patch.object(grafana_client._session, "get") as mock_get:
+            mock_get.return_value = _response(
+                content=json.dumps({"dashboard": {"uid": "dash1", "title": "Dashboard 1"}}).encode(),
+            )
+
+            result = grafana_client.get_dashboard("dash1")
 
             assert result["dashboard"]["uid"] == "dash1"
 
+    def test_get_or_create_folder_creates_missing(self, grafana_client):
+        """A folder not in the listing should be created and returned."""
+        with (
+            patch.object(grafana_client._session, "get", return_value=_response(json_data=[{"title": "Other"}])),
+            patch.object(grafana_client._session, "post") as mock_post,
+        ):
+            mock_post.return_value = _response(json_data={"uid": "f1", "title": "Team A"})
+
+            folder = grafana_client.get_or_create_folder("Team A")
+
+        assert folder == {"uid": "f1", "title": "Team A"}
+        assert mock_post.call_args.kwargs["json"] == {"title": "Team A"}
+
+    def test_session_mounts_pooled_adapter(self, grafana_client):
+        """Client should route all requests through one pooled session."""
+        adapter = grafana_client._session.get_adapter("https://grafana.example.com/api/search")
+        assert adapter._pool_maxsize == POOL_MAXSIZE
+
+    def test_pool_sized_for_concurrency(self):
+        """A client shared by more threads should keep as many connections alive."""
+        client = GrafanaClient("https://grafana.example.com", "admin", "secret", pool_maxsize=32)
+        adapter = client._session.get_adapter("https://grafana.example.com/api/search")
+        assert adapter._pool_maxsize == 32
+
 
 class TestMain:
     """Tests for main function."""
 
-    @patch("grafana_weaver.main.GrafanaClient")
-    @patch("grafana_weaver.main.JsonnetBuilder")
-    @patch("grafana_weaver.main.GrafanaConfigManager")
-    def test_main_success(self, mock_config_mgr, mock_builder, mock_client, tmp_path, monkeypatch):
+    def test_main_success(self, tmp_path, monkeypatch):
         """Main should orchestrate build and upload."""
         # Set environment variable
         monkeypatch.setenv("GRAFANA_CONTEXT", "test-context")
@@ -170,7 +318,7 @@ class TestMain:
         build_dir = dashboards_dir / "build"
         build_dir.mkdir(parents=True)
         dashboard_file = build_dir / "test.json"
-        dashboard_file.write_text('{"uid": "test", "title": "Test"}')
+        dashboard_file.write_bytes('{"uid": "test", "title": "Température"}'.encode())
 
         # Mock config manager
         mock_manager = Mock()
@@ -180,22 +328,25 @@ class TestMain:
             "password": "secret",
             "org-id": 1,
         }
-        mock_config_mgr.return_value = mock_manager
+        mock_config_mgr = Mock(return_value=mock_manager)
+        monkeypatch.setattr("grafana_weaver.main.GrafanaConfigManager", mock_config_mgr)
 
         # Mock builder - return the actual file path we created
         mock_builder_instance = Mock()
         mock_builder_instance.build_all.return_value = [dashboard_file]
-        mock_builder.return_value = mock_builder_instance
+        monkeypatch.setattr("grafana_weaver.main.JsonnetBuilder", Mock(return_value=mock_builder_instance))
 
         # Mock client
         mock_client_instance = Mock()
         mock_client_instance.upload_dashboard.return_value = {"status": "success"}
-        mock_client.return_value = mock_client_instance
+        mock_client = Mock(return_value=mock_client_instance)
+        monkeypatch.setattr("grafana_weaver.main.GrafanaClient", mock_client)
 
         # Create args object
         args = SimpleNamespace(
             dashboard_dir=dashboards_dir,
-            grafana_context="test-context"
+            grafana_context="test-context",
+            concurrency=4,
         )
         upload_dashboards(args)
 
@@ -203,7 +354,11 @@ class TestMain:
         mock_config_mgr.assert_called_once_with(context="test-context")
         mock_manager.get_context.assert_called_once_with()
         mock_builder_instance.build_all.assert_called_once()
-        mock_client_instance.upload_dashboard.assert_called_once()
+        assert mock_client.call_args.kwargs["pool_maxsize"] == 4
+        mock_client_instance.upload_dashboard.assert_called_once_with(
+            {"uid": "test", "title": "Température"},
+            folder_uid=None,
+        )
 
     def test_main_dashboards_dir_not_found(self, tmp_path):
         """Main should exit if dashboards directory not found."""
@@ -211,23 +366,15 @@ class TestMain:
 
         args = SimpleNamespace(
             dashboard_dir=nonexistent_dir,
-            grafana_context="test-context"
+            grafana_context="test-context",
+            concurrency=4,
         )
 
         with pytest.raises(SystemExit) as exc_info:
             upload_dashboards(args)
         assert exc_info.value.code == 1
 
-    @patch("grafana_weaver.main.GrafanaClient")
-    @patch("grafana_weaver.main.JsonnetBuilder")
-    @patch("grafana_weaver.main.GrafanaConfigManager")
-    def test_main_uses_dashboard_dir_env(
-        self,
-        mock_config_mgr,
-        mock_builder,
-        mock_client,
-        tmp_path,
-    ):
+    def test_main_uses_dashboard_dir_env(self, tmp_path, monkeypatch):
         """Main should use dashboard_dir from args."""
         # Mock config manager
         mock_manager = Mock()
@@ -237,22 +384,70 @@ class TestMain:
             "password": "secret",
             "org-id": 1,
         }
-        mock_config_mgr.return_value = mock_manager
+        monkeypatch.setattr("grafana_weaver.main.GrafanaConfigManager", Mock(return_value=mock_manager))
 
         # Mock builder
         mock_builder_instance = Mock()
         mock_builder_instance.build_all.return_value = []
-        mock_builder.return_value = mock_builder_instance
+        mock_builder = Mock(return_value=mock_builder_instance)
+        monkeypatch.setattr("grafana_weaver.main.JsonnetBuilder", mock_builder)
+
+        # Nothing was built, so no client should be created
+        mock_client = Mock()
+        monkeypatch.setattr("grafana_weaver.main.GrafanaClient", mock_client)
 
         dashboard_dir = tmp_path / "custom-dashboards"
         dashboard_dir.mkdir()
 
         args = SimpleNamespace(
             dashboard_dir=dashboard_dir,
-            grafana_context="test-context"
+            grafana_context="test-context",
+            concurrency=4,
         )
         upload_dashboards(args)
 
         # Builder should be called with the custom directory
         mock_builder.assert_called_once()
         assert mock_builder.call_args[0][0] == dashboard_dir
+        mock_client.assert_not_called()
+
+    def test_main_uploads_in_parallel_and_reports_in_order(self, tmp_path, monkeypatch, capsys):
+        """Uploads should overlap, create each folder once and report results in file order."""
+        build_dir = tmp_path / "build"
+        (build_dir / "team-a").mkdir(parents=True)
+        json_files = []
+        for name in ("one", "two", "three"):
+            json_file = build_dir / "team-a" / f"{name}.json"
+            json_file.write_text(json.dumps({"uid": name, "title": name.title()}))
+            json_files.append(json_file)
+
+        monkeypatch.setattr(
+            "grafana_weaver.main.GrafanaConfigManager",
+            Mock(return_value=Mock(get_context=Mock(return_value={"server": "s", "user": "u", "password": "p"}))),
+        )
+        monkeypatch.setattr("grafana_weaver.main.JsonnetBuilder", Mock(return_value=Mock(build_all=lambda: json_files)))
+
+        # Every upload waits until all three are in flight, so a serial upload loop would time out
+        barrier = threading.Barrier(3, timeout=5)
+
+        def upload_dashboard(dashboard_json, folder_uid=None):
+            barrier.wait()
+            if dashboard_json["uid"] == "two":
+                raise RuntimeError("boom")
+            return {"status": "success"}
+
+        client = Mock()
+        client.get_or_create_folder.return_value = {"uid": "folder-a"}
+        client.upload_dashboard.side_effect = upload_dashboard
+        monkeypatch.setattr("grafana_weaver.main.GrafanaClient", Mock(return_value=client))
+
+        args = SimpleNamespace(dashboard_dir=tmp_path, grafana_context=None, concurrency=3)
+        with pytest.raises(SystemExit) as exc_info:
+            upload_dashboards(args)
+        assert exc_info.value.code == 1
+
+        client.get_or_create_folder.assert_called_once_with("Team A")
+        assert {c.kwargs["folder_uid"] for c in client.upload_dashboard.call_args_list} == {"folder-a"}
+        out = capsys.readouterr().out
+        assert out.index("Uploaded: One") < out.index("Failed to upload two.json: boom") < out.index("Uploaded: Three")
+        assert "1 failed" in out